@@ -8,9 +8,12 @@ import pandas as pd
 from io import StringIO
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "src")))
-from graph_builder import build_knowledge_graph_from_config
+from graph_store import load_or_build_graph
 from graph_queries import apply_logical_rule
+from relation_graph import ACTIVITY_RELATIONS, INTEREST_RELATIONS
+from rule_compiler import RuleError
 from prompt_to_rules import extract_rules_from_prompt_llm3
+from rule_cache import RuleCache
 from semantic_matcher import SemanticMatcher
 
 # Streamlit Page Config
@@ -42,18 +45,26 @@ st.markdown("""
 """)
 st.markdown("---")
 
-# Load Graph
-##st.cache_resource
-G, matcher = build_knowledge_graph_from_config(
-    "src/graph_schema.json",
-    {
-        "users": "data/users.csv",
-        "products": "data/products.csv",
-        "orders": "data/orders.csv",
-        "streaming": "data/streaming.csv"
-    }
-), None
-matcher = SemanticMatcher(G)
+# Load Graph (from a snapshot when the schema and CSVs are unchanged)
+@st.cache_resource
+def load_graph():
+    G, index = load_or_build_graph(
+        "src/graph_schema.json",
+        {
+            "users": "data/users.csv",
+            "products": "data/products.csv",
+            "orders": "data/orders.csv",
+            "streaming": "data/streaming.csv"
+        }
+    )
+    return G, SemanticMatcher(G), index
+
+G, matcher, index = load_graph()
+
+# Rules already extracted for a prompt (same wording, model and system prompt)
+@st.cache_resource
+def load_rule_cache():
+    return RuleCache(".rule_cache/rules.sqlite")
 
 # Create two columns: left for label, right for trash icon
 col1, col2 = st.columns([12, 1])
@@ -85,7 +96,7 @@ if "audience" not in st.session_state:
 st.markdown("---")
 if st.button("🧠 Create Rule", use_container_width=True):
     with st.spinner("Extracting rule from LLM..."):
-        rules_obj = extract_rules_from_prompt_llm3(prompt)
+        rules_obj = extract_rules_from_prompt_llm3(prompt, cache=load_rule_cache(), stream=True)
         if "error" in rules_obj:
             st.error("❌ Failed to extract rule.")
             st.code(rules_obj["raw_response"])
@@ -119,8 +130,13 @@ if st.session_state.rule_conditions:
 st.markdown("---")
 if st.button("🎯 Generate Audience", use_container_width=True):
     with st.spinner("Filtering matched users..."):
-        st.session_state.audience = apply_logical_rule(G, {"conditions": st.session_state.rule_conditions}, matcher=matcher)
-        st.success(f"✅ Total Matched Users: {len(st.session_state.audience)}")
+        try:
+            st.session_state.audience = apply_logical_rule(G, {"conditions": st.session_state.rule_conditions}, matcher=matcher, index=index)
+        except RuleError as e:
+            st.session_state.audience = set()
+            st.error(f"❌ Invalid rule: {e}")
+        else:
+            st.success(f"✅ Total Matched Users: {len(st.session_state.audience)}")
 
         # Sample users
         if st.session_state.audience:
@@ -140,12 +156,12 @@ if st.button("🕸️ Visualize Graph", use_container_width=True):
         subG = nx.DiGraph()
         for user in st.session_state.audience:
             subG.add_node(user, color='lightblue')
-            for u, v, d in G.out_edges(user, data=True):
-                if d.get("relation") in ["purchased", "watched"]:
-                    subG.add_edge(u, v, label=d["relation"])
-                    for _, tag_node, tag_data in G.out_edges(v, data=True):
-                        if tag_data.get("relation") in ["tagged_as", "about"]:
-                            subG.add_edge(v, tag_node, label=tag_data["relation"])
+            for relation in ACTIVITY_RELATIONS:
+                for v in G.relation_successors(user, relation):
+                    subG.add_edge(user, v, label=relation)
+                    for tag_relation in INTEREST_RELATIONS:
+                        for tag_node in G.relation_successors(v, tag_relation):
+                            subG.add_edge(v, tag_node, label=tag_relation)
 
         fig, ax = plt.subplots(figsize=(7, 5))
         pos = nx.spring_layout(subG, seed=42, k=0.3)
@@ -0,0 +1,75 @@
+# benchmarks/bench_audience.py
+#
+# Combining audience segments as bitmap-backed Audiences vs. Python sets of
+# user id strings: union / intersection / difference / cardinality time and
+# memory per segment.
+#
+#   python benchmarks/bench_audience.py [--users 10000000] [--density 0.3]
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from audience import Audience
+
+
+class UserUniverse:
+    """Just the user numbering part of a GraphIndex."""
+
+    def __init__(self, num_users):
+        self.users = tuple(f"user_{i}" for i in range(num_users))
+        self.user_position = {user: i for i, user in enumerate(self.users)}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def measured(fn):
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000_000)
+    parser.add_argument("--density", type=float, default=0.3)
+    args = parser.parse_args()
+
+    universe = UserUniverse(args.users)
+    rng = np.random.default_rng(42)
+    mask_a = rng.random(args.users) < args.density
+    mask_b = rng.random(args.users) < args.density
+
+    a, a_mb = measured(lambda: Audience.from_mask(universe, mask_a))
+    b = Audience.from_mask(universe, mask_b)
+    set_a, set_a_mb = measured(lambda: a.to_set())
+    set_b = b.to_set()
+    print(f"{args.users:,} users, ~{len(a):,} per segment")
+    print(f"memory per segment: Audience {a_mb:.1f} MB, set {set_a_mb:.1f} MB")
+
+    print(f"{'op':>14} {'Audience (ms)':>14} {'set (ms)':>10}")
+    for name, bitmap_op, set_op in [
+        ("union", lambda: a | b, lambda: set_a | set_b),
+        ("intersection", lambda: a & b, lambda: set_a & set_b),
+        ("difference", lambda: a - b, lambda: set_a - set_b),
+    ]:
+        combined, bitmap_ms = timed(bitmap_op)
+        expected, set_ms = timed(set_op)
+        count, count_ms = timed(lambda: len(combined))
+        assert count == len(expected)
+        print(f"{name:>14} {bitmap_ms + count_ms:14.1f} {set_ms:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_cold_start.py
+#
+# Cold-start time of a fresh process that needs the graph and its index:
+# parsing the CSVs and building everything vs. loading a snapshot.
+#
+#   python benchmarks/bench_cold_start.py [--scales 1 10 100]
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import SCHEMA_PATH, write_scaled_dataset
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+STARTUP = """
+import contextlib, io, sys
+sys.path.insert(0, {src!r})
+from graph_store import load_or_build_graph
+with contextlib.redirect_stdout(io.StringIO()):
+    G, index = load_or_build_graph({schema!r}, {data_paths!r}, {snapshot_dir!r})
+"""
+
+
+def cold_start(data_paths, snapshot_dir):
+    script = STARTUP.format(src=SRC, schema=SCHEMA_PATH, data_paths=data_paths, snapshot_dir=snapshot_dir)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", script], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--data-dir", default=None, help="reuse generated CSVs between runs")
+    args = parser.parse_args()
+
+    data_root = args.data_dir or tempfile.mkdtemp(prefix="aag_bench_")
+
+    print(f"{'scale':>6} {'CSV build (s)':>14} {'snapshot (s)':>13} {'speedup':>8}")
+    for scale in args.scales:
+        data_paths = write_scaled_dataset(scale, os.path.join(data_root, f"x{scale}"))
+        snapshot_dir = tempfile.mkdtemp(prefix="aag_snapshot_")
+        try:
+            build_time = cold_start(data_paths, snapshot_dir)    # no snapshot yet: builds and saves one
+            load_time = cold_start(data_paths, snapshot_dir)     # snapshot hit
+        finally:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+        print(f"{scale:>6} {build_time:14.2f} {load_time:13.2f} {build_time / load_time:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
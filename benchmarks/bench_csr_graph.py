@@ -0,0 +1,94 @@
+# benchmarks/bench_csr_graph.py
+#
+# Memory held by the graph and two-hop traversal time (user → item →
+# interest, distinct interests per user) for networkx.DiGraph vs. CSRGraph.
+# Memory is what tracemalloc still sees allocated after the build.
+#
+#   python benchmarks/bench_csr_graph.py [--scale 100]
+
+import argparse
+import contextlib
+import gc
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from csr_graph import build_csr_graph_from_config
+from graph_builder import build_knowledge_graph_from_config
+from synthetic import SCHEMA_PATH, write_scaled_dataset
+
+
+def measured_build(build):
+    gc.collect()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph = build()
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return graph, held / 2**20
+
+
+def two_hop_dicts(graph, users):
+    """Per-node walk through graph.succ, the way the query code traverses."""
+    succ = graph.succ
+    total = 0
+    for user in users:
+        reached = set()
+        for item in succ[user]:
+            reached.update(succ[item])
+        total += len(reached)
+    return total
+
+
+def two_hop_arrays(graph, users):
+    """Same walk on CSRGraph arrays: two expand() hops, then distinct (user, target) pairs."""
+    sources = np.array([graph.position[user] for user in users], dtype=np.int64)
+    first_origins, items = graph.expand(sources)
+    second_origins, targets = graph.expand(items)
+    pairs = np.sort(first_origins[second_origins] * len(graph.ids) + targets)
+    return int(len(pairs) > 0) + int(np.count_nonzero(pairs[1:] != pairs[:-1]))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--data-dir", default=None, help="reuse generated CSVs between runs")
+    args = parser.parse_args()
+
+    data_root = args.data_dir or tempfile.mkdtemp(prefix="aag_bench_")
+    data_paths = write_scaled_dataset(args.scale, os.path.join(data_root, f"x{args.scale}"))
+
+    G, nx_mb = measured_build(lambda: build_knowledge_graph_from_config(SCHEMA_PATH, data_paths))
+    users = [node for node, kind in G.nodes(data="type") if kind == "user"]
+    nx_count, nx_time = timed(two_hop_dicts, G, users)
+    edges = G.number_of_edges()
+    del G
+    gc.collect()
+
+    C, csr_mb = measured_build(lambda: build_csr_graph_from_config(SCHEMA_PATH, data_paths))
+    csr_count, csr_time = timed(two_hop_dicts, C, users)
+    array_count, array_time = timed(two_hop_arrays, C, users)
+    assert nx_count == csr_count == array_count
+
+    print(f"scale {args.scale}: {len(C.ids)} nodes, {edges} edges, {len(users)} users, {nx_count} two-hop pairs")
+    print(f"{'backend':>22} {'memory (MB)':>12} {'two-hop (s)':>12}")
+    print(f"{'networkx.DiGraph':>22} {nx_mb:12.1f} {nx_time:12.3f}")
+    print(f"{'CSRGraph (succ view)':>22} {csr_mb:12.1f} {csr_time:12.3f}")
+    print(f"{'CSRGraph (expand)':>22} {'':>12} {array_time:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
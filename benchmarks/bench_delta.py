@@ -0,0 +1,71 @@
+# benchmarks/bench_delta.py
+#
+# Cost of ingesting a daily delta (1% new order and streaming rows) with
+# apply_delta, against rebuilding the graph and its index from scratch.
+#
+#   python benchmarks/bench_delta.py [--scale 100] [--fraction 0.01]
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from audience import Audience
+from graph_builder import apply_delta, build_knowledge_graph_from_config
+from graph_index import build_graph_index
+from synthetic import SCHEMA_PATH, write_scaled_dataset
+
+
+def delta_rows(path, fraction, seed):
+    """A sample of existing rows where half the users are replaced by new ones."""
+    df = pd.read_csv(path).sample(frac=fraction, random_state=seed).reset_index(drop=True)
+    df.loc[::2, "user_id"] = df.loc[::2, "user_id"] + "_new"
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--fraction", type=float, default=0.01)
+    parser.add_argument("--data-dir", default=None, help="reuse generated CSVs between runs")
+    args = parser.parse_args()
+
+    data_paths = write_scaled_dataset(args.scale, os.path.join(args.data_dir or tempfile.mkdtemp(prefix="aag_bench_"), f"x{args.scale}"))
+    deltas = {name: delta_rows(data_paths[name], args.fraction, seed) for seed, name in enumerate(["orders", "streaming"])}
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        G = build_knowledge_graph_from_config(SCHEMA_PATH, data_paths)
+    index = build_graph_index(G, SCHEMA_PATH)
+    full = time.perf_counter() - start
+
+    old_users = index.users[:2]
+    before = Audience.from_users(index, old_users)
+
+    start = time.perf_counter()
+    edges = sum(apply_delta(G, name, rows, SCHEMA_PATH, index=index) for name, rows in deltas.items())
+    delta = time.perf_counter() - start
+
+    # Audiences built before the delta are shorter than the grown index; they
+    # must still combine correctly with ones built after it.
+    new_users = index.users[-2:]
+    after = Audience.from_users(index, (old_users[0],) + new_users)
+    assert (before & after).to_set() == {old_users[0]}
+    assert (before | after).to_set() == set(old_users + new_users)
+    assert (after - before).to_set() == set(new_users) and len(before - after) == 1
+    assert before == Audience.from_users(index, old_users) and new_users[0] not in before
+
+    print(f"scale {args.scale}: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
+    print(f"full build + index:   {full:8.3f} s")
+    print(f"apply_delta ({edges} edges, {args.fraction:.0%} of orders + streaming): {delta:8.3f} s "
+          f"({delta / full:.1%} of a full build)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_graph_build.py
+#
+# Compares the bulk graph builder against the row-by-row reference builder
+# at 10x, 100x and 1000x the sample data size.
+#
+#   python benchmarks/bench_graph_build.py [--scales 10 100 1000] [--legacy-max-scale 100]
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import networkx as nx
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from graph_builder import build_knowledge_graph_from_config
+from synthetic import SCHEMA_PATH, write_scaled_dataset
+
+
+def build_knowledge_graph_from_config_old(schema_path, data_paths):
+    """
+    Row-by-row reference builder graph_builder used before the bulk one (baseline).
+    """
+    with open(schema_path, 'r') as f:
+        config = json.load(f)
+
+    G = nx.DiGraph()
+
+    # Load all datasets
+    dataframes = {k: pd.read_csv(v) for k, v in data_paths.items()}
+
+    # 1. Create all nodes from schema
+    for dataset_name, df in dataframes.items():
+        for _, row in df.iterrows():
+            for col, node_type in config['nodes'].items():
+                if col in row:
+                    node_id = row[col]
+                    if not G.has_node(node_id):
+                        G.add_node(node_id, type=node_type)
+
+    # 2. Inject attributes for user nodes
+    if "users" in dataframes:
+        for _, row in dataframes["users"].iterrows():
+            user_id = row["user_id"]
+            if G.has_node(user_id):
+                G.nodes[user_id]["age"] = int(row["age"]) if not pd.isna(row["age"]) else None
+                G.nodes[user_id]["gender"] = row["gender"] if not pd.isna(row["gender"]) else None
+                G.nodes[user_id]["location"] = row["location"] if not pd.isna(row["location"]) else None
+
+    # 3. Add edges
+    for edge in config['edges']:
+        src_col = edge['from']
+        tgt_col = edge['to']
+        relation = edge['relation']
+        dataset = edge['via']
+
+        if dataset not in dataframes:
+            continue
+
+        for _, row in dataframes[dataset].iterrows():
+            if src_col in row and tgt_col in row:
+                G.add_edge(row[src_col], row[tgt_col], relation=relation)
+
+    print("✅ Graph successfully created")
+    print("Number of nodes:", G.number_of_nodes())
+    print("Number of edges:", G.number_of_edges())
+    return G
+
+
+def timed_build(builder, data_paths):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        G = builder(SCHEMA_PATH, data_paths)
+    return G, time.perf_counter() - start
+
+
+def same_graph(a, b):
+    return (
+        list(a.nodes(data=True)) == list(b.nodes(data=True))
+        and list(a.edges(data=True)) == list(b.edges(data=True))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--legacy-max-scale", type=int, default=100,
+                        help="skip the row-by-row builder above this scale (it takes hours at 1000x)")
+    parser.add_argument("--data-dir", default=None, help="reuse generated CSVs between runs")
+    args = parser.parse_args()
+
+    data_root = args.data_dir or tempfile.mkdtemp(prefix="aag_bench_")
+
+    print(f"{'scale':>6} {'nodes':>10} {'edges':>10} {'old (s)':>10} {'bulk (s)':>10} {'speedup':>8}")
+    for scale in args.scales:
+        data_paths = write_scaled_dataset(scale, os.path.join(data_root, f"x{scale}"))
+
+        G, bulk_time = timed_build(build_knowledge_graph_from_config, data_paths)
+
+        old_time = None
+        if scale <= args.legacy_max_scale:
+            G_old, old_time = timed_build(build_knowledge_graph_from_config_old, data_paths)
+            assert same_graph(G, G_old), f"graphs differ at scale {scale}"
+
+        old_col = f"{old_time:10.2f}" if old_time is not None else f"{'skipped':>10}"
+        speedup = f"{old_time / bulk_time:7.1f}x" if old_time is not None else f"{'-':>8}"
+        print(f"{scale:>6} {G.number_of_nodes():>10} {G.number_of_edges():>10} {old_col} {bulk_time:10.2f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_interest_index.py
+#
+# Per-user compiled predicate vs. set algebra over the interest → users
+# index, on a synthetic user graph.
+#
+#   python benchmarks/bench_interest_index.py [--users 1000000]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from graph_index import build_graph_index
+from graph_queries import apply_logical_rule
+from synthetic import SAMPLE_RULE, SCHEMA_PATH, ExactMatcher, make_synthetic_graph
+
+INTEREST_RULE = {
+    "conditions": {
+        "and": [
+            {"field": "tag", "in": ["crypto", "blockchain", "finance"]},
+            {"or": [
+                {"field": "genre", "in": ["finance", "news"]},
+                {"field": "tag", "in": ["career"]},
+            ]},
+        ]
+    }
+}
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"Building synthetic graph with {args.users:,} users...")
+    G = make_synthetic_graph(args.users)
+    matcher = ExactMatcher()
+
+    index, build_time = timed(build_graph_index, G, SCHEMA_PATH)
+    print(f"Index built in {build_time:.2f}s ({len(index.users_by_interest)} interests)")
+
+    print(f"{'rule':>10} {'matched':>10} {'scan (s)':>9} {'index (s)':>10} {'speedup':>8}")
+    for name, rule in [("interest", INTEREST_RULE), ("sample", SAMPLE_RULE)]:
+        expected, scan_time = timed(apply_logical_rule, G, rule, matcher)
+        got, index_time = timed(apply_logical_rule, G, rule, matcher, index=index)
+        assert got.to_set() == expected, f"index evaluation of '{name}' disagrees with the per-user scan"
+        print(f"{name:>10} {len(got):>10} {scan_time:9.2f} {index_time:10.2f} {scan_time / index_time:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
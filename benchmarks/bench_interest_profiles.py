@@ -0,0 +1,72 @@
+# benchmarks/bench_interest_profiles.py
+#
+# Tag/genre checks walking the graph per condition vs. reading cached
+# InterestProfiles, for a rule with three interest conditions. "cold" is
+# the first rule run against an empty cache, "warm" a later run.
+#
+#   python benchmarks/bench_interest_profiles.py [--users 200000] [--budget-mb 256]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from graph_queries import apply_logical_rule, evaluate_logic_block
+from interest_profiles import InterestProfiles
+from synthetic import ExactMatcher, make_synthetic_graph
+
+THREE_INTERESTS_RULE = {
+    "conditions": {
+        "and": [
+            {"field": "tag", "in": ["crypto", "blockchain"]},
+            {"or": [
+                {"field": "genre", "in": ["finance", "news"]},
+                {"field": "tag", "in": ["career"]},
+            ]},
+            {"field": "genre", "in": ["sports", "finance"]},
+        ]
+    }
+}
+
+
+def interpreted(graph, rule, matcher, profiles=None):
+    return {
+        node for node, data in graph.nodes(data=True)
+        if data.get("type") == "user"
+        and evaluate_logic_block(data, rule["conditions"], matcher, graph, node, profiles)
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--budget-mb", type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"Building synthetic graph with {args.users:,} users...")
+    G = make_synthetic_graph(args.users)
+    matcher = ExactMatcher()
+    rule = THREE_INTERESTS_RULE
+
+    print(f"{'path':>12} {'walk (s)':>9} {'cold (s)':>9} {'warm (s)':>9}")
+    for name, evaluate in [("interpreter", interpreted), ("compiled", apply_logical_rule)]:
+        expected, walk_time = timed(evaluate, G, rule, matcher)
+        profiles = InterestProfiles(G, max_bytes=args.budget_mb * 2**20)
+        cold, cold_time = timed(evaluate, G, rule, matcher, profiles=profiles)
+        warm, warm_time = timed(evaluate, G, rule, matcher, profiles=profiles)
+        assert cold == warm == expected, f"{name} with profiles disagrees with the graph walk"
+        print(f"{name:>12} {walk_time:9.2f} {cold_time:9.2f} {warm_time:9.2f}")
+
+    print(f"{len(profiles):,} profiles cached, ~{profiles.nbytes / 2**20:.1f} MB "
+          f"({profiles.hits:,} hits, {profiles.misses:,} misses, {profiles.evictions:,} evictions)")
+
+
+if __name__ == "__main__":
+    main()
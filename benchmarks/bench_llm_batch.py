@@ -0,0 +1,91 @@
+# benchmarks/bench_llm_batch.py
+#
+# Serial extract_rules_from_prompt_llm3 calls vs. extract_rules_batch at
+# several concurrency levels, against a local stub chat completions
+# endpoint that answers every request after a fixed latency.
+#
+#   python benchmarks/bench_llm_batch.py [--prompts 100] [--latency 0.5]
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+RULE = {"conditions": {"and": [{"field": "age", "operator": ">", "value": 25}, {"field": "tag", "in": ["crypto"]}]}}
+
+
+def start_stub(latency):
+    body = json.dumps({"choices": [{"message": {"content": json.dumps(RULE)}}]}).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.request_queue_size = 256
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_batch(prompts, concurrency, client):
+    from prompt_to_rules import extract_rules_batch
+
+    results = {}
+    async for position, result in extract_rules_batch(prompts, concurrency=concurrency, client=client):
+        results[position] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server = start_stub(args.latency)
+    os.environ["OPENROUTER_URL"] = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    os.environ.setdefault("OPENROUTER_API_KEY", "stub")
+    from llm_client import LLMClient
+    from prompt_to_rules import extract_rules_from_prompt_llm3
+
+    prompts = [f"campaign brief #{i}: young crypto fans in Texas" for i in range(args.prompts)]
+    serial_count = min(len(prompts), 10)
+
+    start = time.perf_counter()
+    for prompt in prompts[:serial_count]:
+        assert extract_rules_from_prompt_llm3(prompt) == RULE
+    serial_time = (time.perf_counter() - start) / serial_count * len(prompts)
+    print(f"{len(prompts)} prompts, {args.latency:.2f}s stub latency")
+    print(f"{'concurrency':>12} {'time (s)':>9} {'speedup':>8}")
+    print(f"{'serial':>12} {serial_time:9.2f} {1.0:7.1f}x   (extrapolated from {serial_count} calls)")
+
+    for concurrency in (4, 16, 64):
+        client = LLMClient(pool_size=concurrency)
+        start = time.perf_counter()
+        results = asyncio.run(run_batch(prompts, concurrency, client))
+        batch_time = time.perf_counter() - start
+        assert len(results) == len(prompts) and all(result == RULE for result in results.values())
+        print(f"{concurrency:>12} {batch_time:9.2f} {serial_time / batch_time:7.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
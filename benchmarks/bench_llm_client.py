@@ -0,0 +1,138 @@
+# benchmarks/bench_llm_client.py
+#
+# LLMClient against a local stub chat completions endpoint that can be told
+# to fail: keep-alive connection reuse (vs. a new connection per call), 429 /
+# 5xx retries with backoff, Retry-After, read timeouts, running out of
+# retries, and the latency metrics.
+#
+#   python benchmarks/bench_llm_client.py [--calls 200]
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from llm_client import LLMClient
+
+REPLY = json.dumps({"choices": [{"message": {"content": "{}"}}]}).encode("utf-8")
+PAYLOAD = {"model": "stub", "messages": [{"role": "user", "content": "hi"}]}
+
+
+def start_stub():
+    """
+    Stub endpoint answering from `script`, a list of responses to give
+    before the default 200: an int status, (status, retry_after) or
+    ("sleep", seconds) to stall past the client's read timeout.
+    """
+    script = []
+    ports = set()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        wbufsize = -1  # headers and body in one send, so Nagle's algorithm doesn't stall keep-alive calls
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                ports.add(self.client_address[1])
+                action = script.pop(0) if script else 200
+            if isinstance(action, tuple) and action[0] == "sleep":
+                time.sleep(action[1])
+                action = 200
+            status, retry_after = action if isinstance(action, tuple) else (action, None)
+            body = REPLY if status == 200 else json.dumps({"error": {"code": status}}).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if retry_after is not None:
+                self.send_header("Retry-After", str(retry_after))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.request_queue_size = 128
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, script, ports
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    server, script, ports = start_stub()
+    url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    headers = {"Authorization": "Bearer stub", "Content-Type": "application/json"}
+
+    # Connection reuse: one pooled client vs. a new connection per call.
+    client = LLMClient(url=url, api_key="stub")
+    ports.clear()
+    _, pooled = timed(lambda: [client.chat_completion(**PAYLOAD) for _ in range(args.calls)])
+    pooled_connections = len(ports)
+    ports.clear()
+    _, fresh = timed(lambda: [requests.post(url, headers=headers, json=PAYLOAD, timeout=5).json() for _ in range(args.calls)])
+    fresh_connections = len(ports)
+    assert pooled_connections == 1, f"pooled client opened {pooled_connections} connections"
+    print(f"{args.calls} calls")
+    print(f"{'client':>20} {'time (s)':>9} {'connections':>12}")
+    print(f"{'pooled LLMClient':>20} {pooled:9.3f} {pooled_connections:>12}")
+    print(f"{'requests.post':>20} {fresh:9.3f} {fresh_connections:>12}")
+
+    print(f"\n{'case':>28} {'status':>7} {'attempts':>9} {'time (s)':>9}")
+
+    retrying = LLMClient(url=url, api_key="stub", backoff=0.1, max_backoff=1.0, max_retries=3)
+
+    def check(label, actions, expected_status, expected_attempts, min_time=0.0, max_time=None, client=retrying):
+        script[:] = actions
+        retries_before = client.metrics.retries
+        response, elapsed = timed(lambda: client.post(PAYLOAD))
+        attempts = client.metrics.retries - retries_before + 1
+        assert response.status_code == expected_status, f"{label}: status {response.status_code}"
+        assert attempts == expected_attempts, f"{label}: {attempts} attempts"
+        assert elapsed >= min_time and (max_time is None or elapsed <= max_time), f"{label}: took {elapsed:.2f}s"
+        print(f"{label:>28} {response.status_code:>7} {attempts:>9} {elapsed:9.2f}")
+        return response
+
+    check("429 then 200", [429], 200, 2, max_time=0.5)
+    check("502, 503, 504 then 200", [502, 503, 504], 200, 4, min_time=0.35 * 0.5)
+    check("429 with Retry-After: 1", [(429, 1)], 200, 2, min_time=1.0)
+    check("Retry-After over the cap", [(429, 60)], 200, 2, min_time=1.0, max_time=1.5)
+    response = check("retries used up", [500] * 4, 500, 4)
+    assert response.json() == {"error": {"code": 500}}, "last error response should be returned"
+    check("400 is not retried", [400], 400, 1)
+
+    slow = LLMClient(url=url, api_key="stub", read_timeout=0.2, backoff=0.05, max_retries=2)
+    check("read timeout then 200", [("sleep", 0.5)], 200, 2, client=slow)
+    script[:] = [("sleep", 0.5)] * 3
+    try:
+        slow.post(PAYLOAD)
+        raise AssertionError("timeouts past the last retry should raise")
+    except requests.Timeout:
+        print(f"{'timeouts past the last retry':>28} {'raised':>7} {3:>9}")
+    script.clear()
+
+    print("\nmetrics:", {key: round(value, 4) if isinstance(value, float) else value
+                        for key, value in retrying.metrics.summary().items()})
+    summary = slow.metrics.summary()
+    assert summary["failures"] == 1 and summary["calls"] == 2, summary
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
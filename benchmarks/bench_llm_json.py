@@ -0,0 +1,161 @@
+# benchmarks/bench_llm_json.py
+#
+# Fuzz and timing suite for llm_json.clean_json_response against the
+# regex-based cleaner it replaced. Starts from the recorded-style LLM outputs
+# in benchmarks/llm_outputs.jsonl (raw text plus the object it should parse
+# to), applies random mutations LLMs are known to produce (fences, prose,
+# smart quotes, trailing commas, braces / commas / quotes inside strings)
+# and checks that every variant still parses to the expected object.
+#
+#   python benchmarks/bench_llm_json.py [--variants 2000] [--seed 0]
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from llm_json import JSONObjectScanner, clean_json_response, parse_json_response
+
+OUTPUTS_PATH = os.path.join(os.path.dirname(__file__), "llm_outputs.jsonl")
+
+PREFIXES = ["", "Here is the rule:\n", "Sure! Based on your prompt (\"young [crypto] fans\"), the rule is:\n\n", "```json\n", "```\n"]
+SUFFIXES = ["", "\n```", "\nLet me know if you want to refine it.", "\n```\nNote: ages are inclusive, e.g. {\"age\": 30}."]
+TRICKY_TAGS = ["kids {toys}", "men's shoes, size 10", "say \"hi\" merch", "[limited] edition", "Women’s fashion", "a,}b"]
+
+
+def legacy_clean_json_response(raw_text):
+    """The regex-based cleaner prompt_to_rules used before llm_json (baseline)."""
+    raw_text = raw_text.replace("“", "\"").replace("”", "\"").replace("‘", "'").replace("’", "'")
+    raw_text = re.sub(r"```.*?\n|```", "", raw_text).strip()
+    raw_text = re.sub(r",\s*([}\]])", r"\1", raw_text)
+
+    open_braces = 0
+    close_index = None
+    for i, char in enumerate(raw_text):
+        if char == "{":
+            open_braces += 1
+        elif char == "}":
+            open_braces -= 1
+            if open_braces == 0:
+                close_index = i
+                break
+
+    if close_index is not None:
+        raw_text = raw_text[:close_index + 1]
+    return raw_text
+
+
+def load_outputs(path=OUTPUTS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def add_tricky_tag(expected, rng):
+    """A copy of expected whose first "in" list gains a tag full of JSON punctuation."""
+    expected = json.loads(json.dumps(expected))
+    stack = [expected]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if isinstance(node.get("in"), list):
+                node["in"].append(rng.choice(TRICKY_TAGS))
+                return expected
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return expected
+
+
+def render(expected, rng):
+    """expected as JSON text, with the formatting quirks LLMs add."""
+    text = json.dumps(expected, indent=rng.choice([None, 2]), ensure_ascii=False)
+    if rng.random() < 0.3:
+        # Trailing commas after the last item of objects and arrays.
+        text = re.sub(r'(["\d\]}])(\s*)([}\]])', lambda m: m.group(1) + "," + m.group(2) + m.group(3), text)
+    if rng.random() < 0.3:
+        # Smart quotes around keys and string values (not inside them).
+        text = re.sub(r'"((?:[^"\\]|\\.)*)"', lambda m: "“" + m.group(1) + "”", text)
+    return text
+
+
+def make_variants(outputs, count, seed=0):
+    """(raw text, expected object) pairs: the recorded outputs plus count fuzzed ones."""
+    rng = random.Random(seed)
+    variants = [(output["raw"], output["expected"]) for output in outputs]
+    for _ in range(count):
+        expected = rng.choice(outputs)["expected"]
+        if rng.random() < 0.5:
+            expected = add_tricky_tag(expected, rng)
+        raw = rng.choice(PREFIXES) + render(expected, rng) + rng.choice(SUFFIXES)
+        variants.append((raw, expected))
+    return variants
+
+
+def parses_to(cleaner, raw, expected):
+    try:
+        return parse_json_response(cleaner(raw)) == expected
+    except Exception:
+        return False
+
+
+def streamed_clean(raw, chunk_size=7):
+    """clean_json_response fed in fixed-size chunks, as a streamed completion would be."""
+    scanner = JSONObjectScanner()
+    for start in range(0, len(raw), chunk_size):
+        if scanner.feed(raw[start:start + chunk_size]):
+            break
+    return scanner.text()
+
+
+def time_cleaner(cleaner, texts, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            cleaner(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--variants", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    outputs = load_outputs()
+    variants = make_variants(outputs, args.variants, args.seed)
+    print(f"{len(outputs)} recorded outputs, {len(variants)} variants in total")
+
+    print(f"{'cleaner':>10} {'parsed ok':>10} {'rate':>7}")
+    for name, cleaner in [("legacy", legacy_clean_json_response), ("scanner", clean_json_response),
+                          ("streamed", streamed_clean)]:
+        ok = sum(parses_to(cleaner, raw, expected) for raw, expected in variants)
+        print(f"{name:>10} {ok:>10} {ok / len(variants):7.1%}")
+        if cleaner is not legacy_clean_json_response:
+            failures = [raw for raw, expected in variants if not parses_to(cleaner, raw, expected)]
+            assert not failures, f"{name} failed on:\n{failures[0]}"
+
+    # Timing on large outputs, where the cleaner's cost shows: strict JSON
+    # (the common case) and JSON with trailing commas and smart quotes.
+    rng = random.Random(args.seed)
+    rules = [{"rules": [expected] * 200} for _, expected in variants[:20]]
+    strict = ["Rule:\n```json\n" + json.dumps(rule, indent=2) + "\n```\nDone." for rule in rules]
+    quirky = []
+    while len(quirky) < len(rules):
+        text = "Rule:\n```json\n" + render(rules[len(quirky)], rng) + "\n```\nDone."
+        if "“" in text and ",\n" in text:
+            quirky.append(text)
+    size = sum(len(text) for text in strict) / len(strict)
+    print(f"\n{len(strict)} outputs of ~{size / 1024:.0f} KB each")
+    print(f"{'cleaner':>10} {'strict (ms)':>12} {'quirky (ms)':>12}")
+    for name, cleaner in [("legacy", legacy_clean_json_response), ("scanner", clean_json_response)]:
+        print(f"{name:>10} {time_cleaner(cleaner, strict) * 1000:12.1f} {time_cleaner(cleaner, quirky) * 1000:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# benchmarks/bench_llm_stream.py
+#
+# Time-to-rule of extract_rules_from_prompt_llm3 with a regular completion
+# vs. a streamed one that returns as soon as the rule object closes, against
+# a local stub that "generates" a token every --token-delay seconds: the rule
+# JSON followed by an explanation, as models tend to add. Streams are run
+# both plain and gzip-encoded (as a CDN may serve them), and an error status
+# on a streamed call must come back with its response body.
+#
+#   python benchmarks/bench_llm_stream.py [--token-delay 0.02] [--runs 3]
+
+import argparse
+import json
+import zlib
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+RULE = {"conditions": {"and": [{"field": "age", "operator": ">", "value": 25},
+                               {"or": [{"field": "tag", "in": ["crypto", "blockchain"]},
+                                       {"field": "genre", "in": ["finance"]}]}]}}
+COMPLETION = ("```json\n" + json.dumps(RULE, indent=2) + "\n```\n\n"
+              + "This rule targets users older than 25 who are interested in crypto, blockchain or finance content. " * 4)
+TOKEN_CHARS = 4
+
+
+def start_stub(token_delay):
+    tokens = [COMPLETION[i:i + TOKEN_CHARS] for i in range(0, len(COMPLETION), TOKEN_CHARS)]
+    stats = {"streamed": [], "cancelled": 0, "gzip": False}
+    error_body = json.dumps({"error": {"message": "model overloaded", "code": 400}}).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if body["messages"][-1]["content"] == "fail":
+                self.send_response(400)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(error_body)))
+                self.end_headers()
+                self.wfile.write(error_body)
+                return
+            if not body.get("stream"):
+                time.sleep(token_delay * len(tokens))
+                data = json.dumps({"choices": [{"message": {"content": COMPLETION}}]}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            gzip = stats["gzip"] and "gzip" in self.headers.get("Accept-Encoding", "")
+            if gzip:
+                self.send_header("Content-Encoding", "gzip")
+                compressor = zlib.compressobj(wbits=31)
+            self.end_headers()
+
+            def send(data):
+                if gzip:
+                    # Flushed per event, so the client can decode each one as it arrives.
+                    data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            sent = 0
+            try:
+                for token in tokens:
+                    time.sleep(token_delay)
+                    send(f"data: {json.dumps({'choices': [{'delta': {'content': token}}]})}\n\n".encode("utf-8"))
+                    sent += 1
+                send(b"data: [DONE]\n\n")
+                if gzip:
+                    data = compressor.flush()
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                stats["cancelled"] += 1
+            stats["streamed"].append(sent)
+            self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats, len(tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    server, stats, token_count = start_stub(args.token_delay)
+    os.environ.setdefault("OPENROUTER_API_KEY", "stub")
+    from llm_client import LLMClient
+    from prompt_to_rules import extract_rules_from_prompt_llm3
+
+    client = LLMClient(url=f"http://127.0.0.1:{server.server_port}/v1/chat/completions")
+    print(f"{token_count} tokens per completion, {args.token_delay * 1000:.0f} ms per token")
+    print(f"{'mode':>10} {'time to rule (s)':>17}")
+    times = {}
+    for mode, stream, gzip in [("full", False, False), ("streamed", True, False), ("gzipped", True, True)]:
+        stats["gzip"] = gzip
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            assert extract_rules_from_prompt_llm3("crypto fans over 25", client=client, stream=stream) == RULE
+        times[mode] = (time.perf_counter() - start) / args.runs
+        print(f"{mode:>10} {times[mode]:17.2f}")
+
+    time.sleep(args.token_delay * 5 + 0.1)  # let the stub notice the closed connections
+    sent = sum(stats["streamed"]) / len(stats["streamed"])
+    print(f"\n{times['full'] / times['streamed']:.1f}x faster; streamed calls were cancelled after "
+          f"{sent:.0f} of {token_count} tokens ({stats['cancelled']} of {2 * args.runs} cancelled)")
+
+    result = extract_rules_from_prompt_llm3("fail", client=client, stream=True)
+    assert "error" in result and "model overloaded" in result["raw_response"], result
+    print("error status on a streamed call: response body returned")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/bench_parallel_build.py
+#
+# Graph build time with the process-pool builder at increasing worker
+# counts, against the single-process builder. The sample data has ~8.8k
+# edges per copy, so --scale 11400 gives a ~100M-edge input (~3.5 GB of CSV).
+#
+#   python benchmarks/bench_parallel_build.py [--scale 100] [--workers 1 2 4 8] [--shard-mb 64]
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from graph_builder import build_knowledge_graph_from_config, build_knowledge_graph_parallel
+from synthetic import SCHEMA_PATH, write_scaled_dataset
+
+
+def timed(build):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        G = build()
+    return time.perf_counter() - start, G.number_of_edges()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--shard-mb", type=float, default=64)
+    parser.add_argument("--data-dir", default=None, help="reuse generated CSVs between runs")
+    args = parser.parse_args()
+
+    data_root = args.data_dir or tempfile.mkdtemp(prefix="aag_bench_")
+    data_paths = write_scaled_dataset(args.scale, os.path.join(data_root, f"x{args.scale}"))
+    shard_bytes = int(args.shard_mb * 2**20)
+
+    baseline, edges = timed(lambda: build_knowledge_graph_from_config(SCHEMA_PATH, data_paths))
+    print(f"scale {args.scale}: {edges} edges, {os.cpu_count()} CPUs, {args.shard_mb:g} MB shards")
+    print(f"{'builder':>16} {'time (s)':>9} {'speedup':>8}")
+    print(f"{'single-process':>16} {baseline:9.2f} {1:7.1f}x")
+    for workers in args.workers:
+        elapsed, _ = timed(lambda: build_knowledge_graph_parallel(SCHEMA_PATH, data_paths, workers, shard_bytes))
+        print(f"{f'{workers} workers':>16} {elapsed:9.2f} {baseline / elapsed:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
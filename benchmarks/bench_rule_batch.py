@@ -0,0 +1,83 @@
+# benchmarks/bench_rule_batch.py
+#
+# apply_logical_rules (one batch) vs. a loop of apply_logical_rule calls,
+# for a morning's worth of campaign rules that reuse the same segments.
+#
+#   python benchmarks/bench_rule_batch.py [--users 100000] [--rules 200]
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from graph_index import build_graph_index
+from graph_queries import apply_logical_rule, apply_logical_rules
+from synthetic import SAMPLE_RULE, SCHEMA_PATH, ExactMatcher, make_synthetic_graph
+
+# Segments campaign rules are assembled from; most rules share a few of them.
+SEGMENTS = [
+    {"field": "age", "operator": ">", "value": 25},
+    {"field": "age", "operator": "<", "value": 45},
+    {"field": "gender", "equals": "Female"},
+    {"field": "location", "in": ["California", "Texas"]},
+    {"field": "location", "in": ["New York", "Florida", "Ohio"]},
+    {"field": "tag", "in": ["crypto", "blockchain"]},
+    {"field": "genre", "in": ["finance"]},
+    {"or": [
+        {"field": "tag", "in": ["crypto", "blockchain"]},
+        {"field": "genre", "in": ["finance"]},
+    ]},
+    {"field": "tag", "in": ["career"]},
+    {"field": "genre", "in": ["news", "sports"]},
+]
+
+
+def make_rules(count, seed=7):
+    rng = random.Random(seed)
+    rules = [dict(SAMPLE_RULE, name="sample")]
+    for i in range(count - 1):
+        segments = rng.sample(SEGMENTS, rng.randint(2, 4))
+        if rng.random() < 0.3:
+            segments.append({"field": "age", "operator": ">=", "value": rng.randrange(18, 60)})
+        rules.append({"name": f"campaign-{i}", "conditions": {rng.choice(["and", "and", "or"]): segments}})
+    return rules
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def sequential(graph, rules, matcher, index=None):
+    return {rule["name"]: apply_logical_rule(graph, rule, matcher, index=index) for rule in rules}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--rules", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"Building synthetic graph with {args.users:,} users...")
+    G = make_synthetic_graph(args.users)
+    matcher = ExactMatcher()
+    index = build_graph_index(G, SCHEMA_PATH)
+    rules = make_rules(args.rules)
+
+    print(f"{'path':>8} {'rules':>6} {'loop (s)':>9} {'batch (s)':>10} {'speedup':>8}")
+    expected, loop_time = timed(sequential, G, rules, matcher)
+    got, batch_time = timed(apply_logical_rules, G, rules, matcher)
+    assert got == expected, "batch evaluation disagrees with the per-rule loop"
+    print(f"{'graph':>8} {len(rules):>6} {loop_time:9.2f} {batch_time:10.2f} {loop_time / batch_time:7.1f}x")
+
+    looped, loop_time = timed(sequential, G, rules, matcher, index)
+    got, batch_time = timed(apply_logical_rules, G, rules, matcher, index)
+    assert all(got[name].to_set() == expected[name] for name in expected), "indexed batch evaluation disagrees"
+    print(f"{'index':>8} {len(rules):>6} {loop_time:9.2f} {batch_time:10.2f} {loop_time / batch_time:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
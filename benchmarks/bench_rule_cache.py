@@ -0,0 +1,105 @@
+# benchmarks/bench_rule_cache.py
+#
+# extract_rules_from_prompt_llm3 with a RuleCache in front of it, against a
+# local stub chat completions endpoint with a fixed latency: a cold call, a
+# repeat of the same prompt written differently, a hit from the SQLite tier
+# once the in-memory LRU is gone, TTL expiry, and error results (which must
+# not be cached).
+#
+#   python benchmarks/bench_rule_cache.py [--latency 0.5]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+RULE = {"conditions": {"and": [{"field": "age", "operator": ">", "value": 25}, {"field": "tag", "in": ["crypto"]}]}}
+
+
+def start_stub(latency):
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            prompt = body["messages"][-1]["content"]
+            calls.append(prompt)
+            time.sleep(latency)
+            # A prompt the model refuses: no JSON in the reply, so the call returns an error.
+            content = "Sorry, I can't build that audience." if "refuse" in prompt else json.dumps(RULE)
+            data = json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server, calls = start_stub(args.latency)
+    os.environ["OPENROUTER_URL"] = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    os.environ.setdefault("OPENROUTER_API_KEY", "stub")
+    from prompt_to_rules import extract_rules_from_prompt_llm3
+    from rule_cache import RuleCache
+
+    path = os.path.join(tempfile.mkdtemp(prefix="aag_rule_cache_"), "rules.sqlite")
+    cache = RuleCache(path)
+
+    def ask(label, prompt, cache, expect_call, expected=RULE):
+        before = len(calls)
+        start = time.perf_counter()
+        result = extract_rules_from_prompt_llm3(prompt, cache=cache)
+        elapsed = time.perf_counter() - start
+        called = len(calls) > before
+        assert called == expect_call, f"{label}: expected {'a' if expect_call else 'no'} API call"
+        assert expected is None or result == expected, f"{label}: got {result}"
+        print(f"{label:>28} {elapsed * 1000:10.2f} {'yes' if called else 'no':>9}")
+        return result
+
+    print(f"stub latency {args.latency:.2f}s")
+    print(f"{'call':>28} {'time (ms)':>10} {'API call':>9}")
+    ask("cold", "Crypto fans in Texas over 25", cache, expect_call=True)
+    ask("same prompt", "Crypto fans in Texas over 25", cache, expect_call=False)
+    ask("normalized prompt", "  crypto FANS in texas\n over 25 ", cache, expect_call=False)
+
+    # A new process: same SQLite file, empty in-memory LRU.
+    cache.close()
+    cache = RuleCache(path)
+    assert len(cache.memory) == 0
+    ask("SQLite tier (LRU empty)", "Crypto fans in Texas over 25", cache, expect_call=False)
+    ask("in-memory LRU again", "Crypto fans in Texas over 25", cache, expect_call=False)
+
+    cache.ttl = 0.2
+    time.sleep(0.3)
+    ask("after TTL expiry", "Crypto fans in Texas over 25", cache, expect_call=True)
+    cache.ttl = 24 * 3600
+
+    result = ask("error result", "please refuse this one", cache, expect_call=True, expected=None)
+    assert "error" in result, result
+    ask("error result, asked again", "please refuse this one", cache, expect_call=True, expected=None)
+
+    cache.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_semantic_expansion.py
+#
+# Counts SentenceTransformer encode calls made while applying one rule on
+# the sample graph: per-user expansion (evaluate_logic_block interpreter)
+# vs. per-rule expansion (apply_logical_rule).
+#
+#   python benchmarks/bench_semantic_expansion.py
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from graph_builder import build_knowledge_graph_from_config
+from graph_queries import apply_logical_rule, evaluate_logic_block
+from semantic_matcher import SemanticMatcher
+from synthetic import SAMPLE_PATHS, SAMPLE_RULE, SCHEMA_PATH
+
+
+class CountingEncoder:
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    def encode(self, *args, **kwargs):
+        self.calls += 1
+        return self.model.encode(*args, **kwargs)
+
+
+def interpreted(graph, rule, matcher):
+    return {
+        node for node, data in graph.nodes(data=True)
+        if data.get("type") == "user" and evaluate_logic_block(data, rule["conditions"], matcher, graph, node)
+    }
+
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        G = build_knowledge_graph_from_config(SCHEMA_PATH, SAMPLE_PATHS)
+    matcher = SemanticMatcher(G)
+    counter = CountingEncoder(matcher.model)
+    matcher.model = counter
+
+    print(f"{'path':>12} {'matched':>8} {'encode calls':>13} {'time (s)':>9}")
+    for name, fn in [("per-user", interpreted), ("per-rule", apply_logical_rule)]:
+        counter.calls = 0
+        start = time.perf_counter()
+        audience = fn(G, SAMPLE_RULE, matcher)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12} {len(audience):>8} {counter.calls:>13} {elapsed:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
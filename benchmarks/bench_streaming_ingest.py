@@ -0,0 +1,55 @@
+# benchmarks/bench_streaming_ingest.py
+#
+# Peak memory (max RSS) and wall time of a fresh process building the graph
+# from scaled CSVs: whole dataframes in memory vs. chunked streaming.
+#
+#   python benchmarks/bench_streaming_ingest.py [--scales 10 100] [--chunksize 100000]
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from synthetic import SCHEMA_PATH, write_scaled_dataset
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+BUILD = """
+import contextlib, io, resource, sys, time
+sys.path.insert(0, {src!r})
+from graph_builder import build_knowledge_graph_from_config
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    G = build_knowledge_graph_from_config({schema!r}, {data_paths!r}, chunksize={chunksize!r})
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, G.number_of_edges())
+"""
+
+
+def build(data_paths, chunksize):
+    script = BUILD.format(src=SRC, schema=SCHEMA_PATH, data_paths=data_paths, chunksize=chunksize)
+    out = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+    elapsed, max_rss_kb, edges = out.split()
+    return float(elapsed), int(max_rss_kb) / 1024, int(edges)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--data-dir", default=None, help="reuse generated CSVs between runs")
+    args = parser.parse_args()
+
+    data_root = args.data_dir or tempfile.mkdtemp(prefix="aag_bench_")
+
+    print(f"{'scale':>6} {'CSV MB':>7} {'mode':>10} {'peak RSS (MB)':>14} {'time (s)':>9} {'edges':>9}")
+    for scale in args.scales:
+        data_paths = write_scaled_dataset(scale, os.path.join(data_root, f"x{scale}"))
+        csv_mb = sum(os.path.getsize(p) for p in data_paths.values()) / 2**20
+        for mode, chunksize in [("in-memory", None), ("streaming", args.chunksize)]:
+            elapsed, peak_mb, edges = build(data_paths, chunksize)
+            print(f"{scale:>6} {csv_mb:7.0f} {mode:>10} {peak_mb:14.0f} {elapsed:9.2f} {edges:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_user_table.py
+#
+# Demographic filters on the columnar UserTable vs. the per-user predicate
+# over node attribute dicts.
+#
+#   python benchmarks/bench_user_table.py [--users 10000000] [--dict-users 1000000]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from graph_index import CategoricalColumn, IntColumn, UserTable
+from rule_compiler import compile_rule
+from synthetic import GENDERS, LOCATIONS
+
+CONDITIONS = {
+    "age range": {"and": [
+        {"field": "age", "operator": ">=", "value": 25},
+        {"field": "age", "operator": "<", "value": 40},
+    ]},
+    "location in": {"or": [{"field": "location", "in": ["California", "Texas", "Ohio"]}]},
+    "mixed": {"and": [
+        {"field": "age", "operator": ">", "value": 30},
+        {"field": "gender", "equals": "Female"},
+        {"field": "location", "in": ["New York", "Florida"]},
+    ]},
+}
+
+
+def make_table(num_users, seed=42):
+    rng = np.random.default_rng(seed)
+    return UserTable({
+        "age": IntColumn(rng.integers(18, 80, num_users), np.ones(num_users, dtype=bool)),
+        "gender": CategoricalColumn(rng.integers(0, len(GENDERS), num_users, dtype=np.int32), list(GENDERS)),
+        "location": CategoricalColumn(rng.integers(0, len(LOCATIONS), num_users, dtype=np.int32), list(LOCATIONS)),
+        "education_level": CategoricalColumn(np.full(num_users, -1, dtype=np.int32), []),
+    })
+
+
+def table_to_dicts(table, num_users):
+    columns = table.columns
+    return [
+        {
+            "age": int(columns["age"].values[i]),
+            "gender": columns["gender"].categories[columns["gender"].codes[i]],
+            "location": columns["location"].categories[columns["location"].codes[i]],
+        }
+        for i in range(num_users)
+    ]
+
+
+class TableIndex:
+    """Just enough of a GraphIndex for field-only rules."""
+
+    def __init__(self, table, num_users):
+        self.user_table = table
+        self.users = range(num_users)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000_000)
+    parser.add_argument("--dict-users", type=int, default=1_000_000,
+                        help="users for the per-user dict scan (extrapolated to --users)")
+    args = parser.parse_args()
+
+    table = make_table(args.users)
+    dicts = table_to_dicts(table, args.dict_users)
+    scale = args.users / args.dict_users
+
+    print(f"{'condition':>12} {'matched':>10} {'mask (ms)':>10} {'dict scan (s, extrapolated)':>28}")
+    for name, conditions in CONDITIONS.items():
+        compiled = compile_rule(conditions)
+
+        start = time.perf_counter()
+        mask = compiled.plan.select(np.ones(args.users, dtype=bool), TableIndex(table, args.users))
+        mask_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        expected = [i for i, data in enumerate(dicts) if compiled.predicate(data, i)]
+        scan_s = (time.perf_counter() - start) * scale
+
+        assert np.flatnonzero(mask[:args.dict_users]).tolist() == expected
+        print(f"{name:>12} {int(mask.sum()):>10} {mask_ms:10.1f} {scan_s:28.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/bench_vector_index.py
+#
+# Recall@k and per-query latency of the IVF vector index against exact
+# search, on synthetic clustered unit vectors shaped like MiniLM embeddings.
+#
+#   python benchmarks/bench_vector_index.py [num_vectors]
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from vector_index import ExactIndex, IVFIndex
+
+DIM = 384
+TOP_K = 5
+NUM_QUERIES = 200
+
+
+def clustered_unit_vectors(n, centers, rng):
+    dim = centers.shape[1]
+    vectors = centers[rng.integers(0, len(centers), n)] + 1.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def timed_search(index, queries):
+    start = time.perf_counter()
+    results = index.search(queries, TOP_K, -1.0)
+    return results, (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((2000, DIM)).astype(np.float32)
+    vectors = clustered_unit_vectors(n, centers, rng)
+    queries = clustered_unit_vectors(NUM_QUERIES, centers, rng)
+
+    exact, exact_latency = timed_search(ExactIndex(vectors), queries)
+    truth = [set(indices) for indices, _ in exact]
+    print(f"{n} vectors x {DIM} dims, top_k={TOP_K}, {NUM_QUERIES} queries")
+    print(f"exact: {exact_latency * 1000:.2f} ms/query")
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(vectors)
+    print(f"ivf build ({len(ivf.centroids)} lists): {time.perf_counter() - start:.1f} s\n")
+
+    print(f"{'n_probe':>8} {'recall@k':>9} {'ms/query':>9} {'speedup':>8}")
+    for n_probe in (1, 4, 8, 16, 32, 64):
+        ivf.n_probe = n_probe
+        results, latency = timed_search(ivf, queries)
+        recall = np.mean([len(set(indices) & t) / TOP_K for (indices, _), t in zip(results, truth)])
+        print(f"{n_probe:>8} {recall:>9.3f} {latency * 1000:>9.2f} {exact_latency / latency:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
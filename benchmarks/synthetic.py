@@ -0,0 +1,124 @@
+# benchmarks/synthetic.py
+
+import os
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCHEMA_PATH = os.path.join(ROOT, "src", "graph_schema.json")
+SAMPLE_PATHS = {
+    "users": os.path.join(ROOT, "data", "users.csv"),
+    "products": os.path.join(ROOT, "data", "products.csv"),
+    "orders": os.path.join(ROOT, "data", "orders.csv"),
+    "streaming": os.path.join(ROOT, "data", "streaming.csv"),
+}
+
+# Columns holding entity ids; these get a per-copy suffix so the graph grows
+# with the data instead of collapsing onto the sample nodes.
+ID_COLUMNS = ["user_id", "product_id", "content_name", "order_id"]
+
+
+def write_scaled_dataset(scale, out_dir):
+    """
+    Writes `scale` stacked copies of each sample CSV to out_dir.
+
+    Copy k renames every id to "<id>_<k>", so users, products and contents are
+    all multiplied by `scale`, while tags and genres stay shared.
+    Returns a data_paths dict for build_knowledge_graph_from_config.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    data_paths = {}
+
+    for name, path in SAMPLE_PATHS.items():
+        out_path = os.path.join(out_dir, f"{name}.csv")
+        data_paths[name] = out_path
+        if os.path.exists(out_path):
+            continue
+
+        df = pd.read_csv(path)
+        copies = []
+        for k in range(scale):
+            copy = df.copy()
+            for col in ID_COLUMNS:
+                if col in copy.columns:
+                    copy[col] = copy[col] + f"_{k}"
+            copies.append(copy)
+        pd.concat(copies, ignore_index=True).to_csv(out_path, index=False)
+
+    return data_paths
+
+
+GENDERS = ["Male", "Female", "Other"]
+LOCATIONS = [
+    "California", "New York", "Texas", "Florida", "Illinois", "Washington", "Massachusetts",
+    "Georgia", "Ohio", "Colorado", "Nevada", "Arizona", "Michigan", "Pennsylvania",
+]
+TAGS = ["blockchain", "sports", "AI", "yoga", "finance", "career", "fitness", "crypto", "reading", "adventure", "tech"]
+GENRES = ["sports", "technology", "comedy", "self-help", "drama", "thriller", "action", "education", "news", "finance", "documentary"]
+
+SAMPLE_RULE = {
+    "conditions": {
+        "and": [
+            {
+                "or": [
+                    {"field": "tag", "in": ["crypto", "blockchain"]},
+                    {"field": "genre", "in": ["finance"]},
+                ]
+            },
+            {"field": "age", "operator": ">", "value": 25},
+            {"field": "location", "in": ["California", "Texas"]},
+        ]
+    }
+}
+
+
+def make_synthetic_graph(num_users, num_products=None, num_contents=None, events_per_user=3, seed=42):
+    """
+    Builds a graph shaped like the sample data directly in networkx,
+    without going through CSVs: users with age/gender/location, products
+    tagged_as a tag, contents about a genre, purchased/watched edges.
+    """
+    import random
+    from relation_graph import RelationDiGraph
+
+    rng = random.Random(seed)
+    num_products = num_products or max(num_users // 2, 1)
+    num_contents = num_contents or max(num_users // 2, 1)
+
+    G = RelationDiGraph()
+    G.add_nodes_from(
+        (f"user_{i}", {
+            "type": "user",
+            "age": rng.randint(18, 79),
+            "gender": rng.choice(GENDERS),
+            "location": rng.choice(LOCATIONS),
+        })
+        for i in range(num_users)
+    )
+    G.add_nodes_from((f"prod_{i}", {"type": "product"}) for i in range(num_products))
+    G.add_nodes_from((f"content_{i}", {"type": "content"}) for i in range(num_contents))
+    G.add_nodes_from((term, {"type": "interest"}) for term in set(TAGS) | set(GENRES))
+
+    G.add_edges_from(((f"prod_{i}", rng.choice(TAGS)) for i in range(num_products)), relation="tagged_as")
+    G.add_edges_from(((f"content_{i}", rng.choice(GENRES)) for i in range(num_contents)), relation="about")
+    G.add_edges_from(
+        ((f"user_{rng.randrange(num_users)}", f"prod_{rng.randrange(num_products)}") for _ in range(num_users * events_per_user // 2)),
+        relation="purchased",
+    )
+    G.add_edges_from(
+        ((f"user_{rng.randrange(num_users)}", f"content_{rng.randrange(num_contents)}") for _ in range(num_users * events_per_user // 2)),
+        relation="watched",
+    )
+    return G
+
+
+class ExactMatcher:
+    """
+    Stand-in for SemanticMatcher that expands a term to itself, so rule
+    evaluation can be benchmarked without loading a SentenceTransformer.
+    """
+
+    def expand(self, term, top_k=5, threshold=0.4, verbose=False):
+        return [term]
+
+    def expand_many(self, terms, top_k=5, threshold=0.4):
+        return [[term] for term in terms]
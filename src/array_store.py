@@ -0,0 +1,42 @@
+# src/array_store.py
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+
+def save_arrays(path, arrays, meta, prefix=".tmp_arrays_"):
+    """
+    Writes the directory `path` as one .npy file per entry of arrays (name →
+    array) plus meta.json. The files go to a temporary directory next to path
+    first, which then replaces path, so a half-written directory is never
+    picked up.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix=prefix)
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), arr)
+        with open(os.path.join(tmp, "meta.json"), 'w') as f:
+            json.dump(meta, f)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def load_meta(path):
+    """The meta.json saved by save_arrays."""
+    with open(os.path.join(path, "meta.json"), 'r') as f:
+        return json.load(f)
+
+
+def load_array(path, name):
+    """The array saved by save_arrays under name, memory-mapped."""
+    return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
@@ -0,0 +1,102 @@
+# src/audience.py
+
+import numpy as np
+
+# Number of set bits in each byte value, for cardinality of packed bitmaps.
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class Audience:
+    """
+    A set of users stored as a packed bitmap over a GraphIndex's dense user
+    positions (1 bit per user in the graph).
+
+    Supports union (|), intersection (&), difference (-) and len() without
+    touching user id strings; ids are only materialized by iteration,
+    to_list() or to_set(). Audiences combined together must come from the
+    same GraphIndex. When GraphIndex.update adds users, Audiences built
+    before it are padded with zeros (the new users are not members) before
+    they are combined or compared.
+    """
+
+    def __init__(self, index, bits):
+        self.index = index
+        self.bits = bits
+
+    @classmethod
+    def from_mask(cls, index, mask):
+        return cls(index, np.packbits(mask))
+
+    @classmethod
+    def from_users(cls, index, users):
+        """Builds an Audience from user ids; ids unknown to the index are ignored."""
+        position = index.user_position
+        mask = np.zeros(len(index.users), dtype=bool)
+        mask[[position[u] for u in users if u in position]] = True
+        return cls.from_mask(index, mask)
+
+    @classmethod
+    def empty(cls, index):
+        return cls.from_mask(index, np.zeros(len(index.users), dtype=bool))
+
+    def padded_bits(self):
+        """bits, zero-padded to the index's current number of users."""
+        size = (len(self.index.users) + 7) // 8
+        if len(self.bits) < size:
+            self.bits = np.concatenate([self.bits, np.zeros(size - len(self.bits), dtype=np.uint8)])
+        return self.bits
+
+    def mask(self):
+        return np.unpackbits(self.padded_bits(), count=len(self.index.users)).astype(bool)
+
+    def positions(self):
+        return np.flatnonzero(self.mask())
+
+    def union(self, other):
+        return Audience(self.index, self.padded_bits() | self.check(other).padded_bits())
+
+    def intersection(self, other):
+        return Audience(self.index, self.padded_bits() & self.check(other).padded_bits())
+
+    def difference(self, other):
+        return Audience(self.index, self.padded_bits() & ~self.check(other).padded_bits())
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def check(self, other):
+        if not isinstance(other, Audience) or other.index is not self.index:
+            raise ValueError("Audiences can only be combined with audiences from the same GraphIndex.")
+        return other
+
+    def __len__(self):
+        return int(POPCOUNT[self.padded_bits()].sum(dtype=np.int64))
+
+    def __bool__(self):
+        return bool(self.bits.any())
+
+    def __contains__(self, user):
+        pos = self.index.user_position.get(user)
+        if pos is None:
+            return False
+        return bool(self.padded_bits()[pos >> 3] & (0x80 >> (pos & 7)))
+
+    def __iter__(self):
+        users = self.index.users
+        return (users[i] for i in self.positions().tolist())
+
+    def __eq__(self, other):
+        if isinstance(other, Audience):
+            return other.index is self.index and np.array_equal(self.padded_bits(), other.padded_bits())
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Audience({len(self)} users)"
+
+    def to_list(self):
+        users = self.index.users
+        return [users[i] for i in self.positions().tolist()]
+
+    def to_set(self):
+        return set(self.to_list())
@@ -0,0 +1,449 @@
+# src/csr_graph.py
+
+import json
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .data_sources import USER_ATTRIBUTE_COLUMNS
+    from .graph_builder import extract_shard
+    from .graph_index import encode_values
+    from .graph_store import ABSENT, MISSING, NONE, VALUE, attribute_state
+except ImportError:
+    from data_sources import USER_ATTRIBUTE_COLUMNS
+    from graph_builder import extract_shard
+    from graph_index import encode_values
+    from graph_store import ABSENT, MISSING, NONE, VALUE, attribute_state
+
+
+class AttributeColumn:
+    """
+    One node attribute for every node: a state per node plus int64 values
+    (categories is None) or int32 codes into `categories`.
+    """
+
+    def __init__(self, state, values, categories=None):
+        self.state = state
+        self.values = values
+        self.categories = categories
+
+    def get(self, i):
+        state = self.state[i]
+        if state != VALUE:
+            return None
+        value = self.values[i]
+        return int(value) if self.categories is None else self.categories[value]
+
+    def tolist(self):
+        """Per-node values, with None for NONE and ABSENT (check `state` to tell them apart)."""
+        if self.categories is None:
+            values = self.values.astype(object)
+        else:
+            values = np.array(list(self.categories) + [None], dtype=object)[np.where(self.state == VALUE, self.values, -1)]
+        values[self.state != VALUE] = None
+        return values.tolist()
+
+
+class CSRGraph:
+    """
+    Read-only, array-backed directed graph with the parts of the
+    networkx.DiGraph API the query code uses: nodes / nodes(data=...),
+    nodes[n], edges(data=...), out_edges(...), succ, number_of_nodes/edges.
+
+    Nodes are numbered 0..n-1; `ids` is the interning table from number to
+    node id and `position` the reverse. Out-adjacency is one CSR per edge
+    relation (adjacency[r] = (indptr, indices) with targets sorted within
+    each row), and a node pair has at most one relation, as in a DiGraph.
+    Node attributes are AttributeColumns. Edge data is exposed as shared
+    read-only {"relation": name} mappings, and relation_successors /
+    relation_edges read a single relation's CSR, like RelationDiGraph.
+
+    Edges are iterated relation by relation, so their order differs from a
+    networkx graph built from the same rows; the edge sets are the same.
+    """
+
+    def __init__(self, ids, attributes, relations, adjacency):
+        self.ids = ids
+        self.position = {node: i for i, node in enumerate(ids)}
+        self.attributes = attributes
+        self.relations = relations
+        self.relation_code = {relation: code for code, relation in enumerate(relations)}
+        self.adjacency = adjacency
+        self.edge_data = [MappingProxyType({"relation": relation}) for relation in relations]
+        self.nodes = NodeView(self)
+        self.succ = AdjacencyView(self)
+
+    @classmethod
+    def from_edges(cls, ids, attributes, relations, sources, targets, codes):
+        """
+        Builds the CSR adjacency from parallel arrays of source / target
+        positions and relation codes. A repeated (source, target) pair keeps
+        the relation of its last occurrence, like DiGraph.add_edge.
+        """
+        n = len(ids)
+        index_dtype = np.int32 if n < 2**31 else np.int64
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        codes = np.asarray(codes, dtype=np.uint8)
+
+        # Last occurrence of every pair, then rows sorted by (source, target).
+        keys = sources * n + targets
+        _, last_from_end = np.unique(keys[::-1], return_index=True)
+        keep = len(keys) - 1 - last_from_end
+        sources, targets, codes = sources[keep], targets[keep], codes[keep]
+
+        adjacency = []
+        for code in range(len(relations)):
+            mask = codes == code
+            rel_sources, rel_targets = sources[mask], targets[mask]
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rel_sources, minlength=n), out=indptr[1:])
+            adjacency.append((indptr, rel_targets.astype(index_dtype)))
+        return cls(ids, attributes, relations, adjacency)
+
+    @classmethod
+    def from_networkx(cls, graph):
+        """Compact copy of a DiGraph whose edges carry only a 'relation' attribute."""
+        ids = list(graph.nodes)
+        position = {node: i for i, node in enumerate(ids)}
+        node_data = [data for _, data in graph.nodes(data=True)]
+        keys = list(dict.fromkeys(key for data in node_data for key in data))
+        attributes = {}
+        for key in keys:
+            values = [data.get(key, MISSING) for data in node_data]
+            state = attribute_state(values)
+            attributes[key] = AttributeColumn(state, *encode_values(values, (state == VALUE).tolist()))
+
+        relations = {}
+        sources, targets, codes = [], [], []
+        for u, v, relation in graph.edges(data="relation"):
+            sources.append(position[u])
+            targets.append(position[v])
+            codes.append(relations.setdefault(relation, len(relations)))
+        if len(relations) > 255:
+            raise ValueError("CSRGraph supports at most 255 distinct edge relations.")
+        return cls.from_edges(ids, attributes, list(relations), sources, targets, codes)
+
+    # --- networkx-compatible surface -------------------------------------
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, node):
+        try:
+            return node in self.position
+        except TypeError:
+            return False
+
+    def has_node(self, node):
+        return node in self
+
+    def number_of_nodes(self):
+        return len(self.ids)
+
+    def number_of_edges(self):
+        return sum(len(indices) for _, indices in self.adjacency)
+
+    def edges(self, data=False, default=None):
+        """All edges as (u, v), (u, v, data) or (u, v, data[key]) tuples."""
+        return self.out_edges(None, data=data, default=default)
+
+    def out_edges(self, nbunch=None, data=False, default=None):
+        """Out-edges of one node, of an iterable of nodes, or of every node (nbunch=None)."""
+        if nbunch is None:
+            return self.iter_all_edges(data, default)
+        if nbunch in self:
+            return self.iter_node_edges([self.position[nbunch]], data, default)
+        return self.iter_node_edges([self.position[node] for node in nbunch if node in self], data, default)
+
+    def iter_all_edges(self, data, default):
+        ids = self.ids
+        for code, (indptr, indices) in enumerate(self.adjacency):
+            value = self.edge_value(code, data, default)
+            sources = np.repeat(np.arange(len(ids)), np.diff(indptr)).tolist()
+            for u, v in zip(sources, indices.tolist()):
+                yield (ids[u], ids[v]) if data is False else (ids[u], ids[v], value)
+
+    def iter_node_edges(self, positions, data, default):
+        ids = self.ids
+        for u in positions:
+            for code, (indptr, indices) in enumerate(self.adjacency):
+                start, end = indptr[u:u + 2].tolist()
+                if start == end:
+                    continue
+                value = self.edge_value(code, data, default)
+                for v in indices[start:end].tolist():
+                    yield (ids[u], ids[v]) if data is False else (ids[u], ids[v], value)
+
+    def relation_successors(self, node, relation):
+        """Successors of node along edges with the given relation (empty if none)."""
+        code = self.relation_code.get(relation)
+        u = self.position.get(node)
+        if code is None or u is None:
+            return ()
+        indptr, indices = self.adjacency[code]
+        start, end = indptr[u:u + 2].tolist()
+        ids = self.ids
+        return [ids[v] for v in indices[start:end].tolist()]
+
+    def relation_edges(self, relation):
+        """(u, v) pairs of every edge with the given relation."""
+        code = self.relation_code.get(relation)
+        if code is None:
+            return
+        indptr, indices = self.adjacency[code]
+        ids = self.ids
+        sources = np.repeat(np.arange(len(ids)), np.diff(indptr)).tolist()
+        for u, v in zip(sources, indices.tolist()):
+            yield ids[u], ids[v]
+
+    def edge_value(self, code, data, default):
+        if data is True:
+            return self.edge_data[code]
+        if data is False:
+            return None
+        return self.edge_data[code].get(data, default)
+
+    # --- array traversal -------------------------------------------------
+
+    def expand(self, sources, relations=None):
+        """
+        One hop from an array of source positions over the given relations
+        (all of them if None). Returns (origins, targets): for every edge
+        followed, the index into `sources` it started from and the target
+        position. Chain calls for multi-hop walks.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        codes = range(len(self.relations)) if relations is None else [
+            self.relation_code[r] for r in relations if r in self.relation_code
+        ]
+        origins, targets = [], []
+        for code in codes:
+            indptr, indices = self.adjacency[code]
+            starts, ends = indptr[sources], indptr[sources + 1]
+            counts = ends - starts
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            # Gather every row slice at once: offsets within each row plus its start.
+            row = np.repeat(np.arange(len(sources)), counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            origins.append(row)
+            targets.append(indices[starts[row] + offsets].astype(np.int64))
+        if not origins:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(origins), np.concatenate(targets)
+
+
+class NodeView:
+    """graph.nodes for a CSRGraph: iterable, callable with data=..., and indexable by node id."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __iter__(self):
+        return iter(self.graph.ids)
+
+    def __len__(self):
+        return len(self.graph.ids)
+
+    def __contains__(self, node):
+        return node in self.graph
+
+    def __getitem__(self, node):
+        """The node's attributes as a new dict; changing it does not change the graph."""
+        i = self.graph.position[node]
+        return {
+            key: column.get(i)
+            for key, column in self.graph.attributes.items()
+            if column.state[i] != ABSENT
+        }
+
+    def __call__(self, data=False, default=None):
+        ids = self.graph.ids
+        if data is False:
+            return iter(ids)
+        if data is True:
+            return zip(ids, self.attribute_dicts())
+        column = self.graph.attributes.get(data)
+        if column is None:
+            return ((node, default) for node in ids)
+        values = column.tolist()
+        absent = (column.state == ABSENT).tolist()
+        return ((node, default if gone else value) for node, value, gone in zip(ids, values, absent))
+
+    def attribute_dicts(self):
+        columns = [
+            (key, column.tolist(), (column.state != ABSENT).tolist())
+            for key, column in self.graph.attributes.items()
+        ]
+        for i in range(len(self.graph.ids)):
+            yield {key: values[i] for key, values, present in columns if present[i]}
+
+
+class AdjacencyView:
+    """graph.succ for a CSRGraph: succ[u] maps each successor of u to its edge data."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, node):
+        return Successors(self.graph, self.graph.position[node])
+
+    def __contains__(self, node):
+        return node in self.graph
+
+    def __iter__(self):
+        return iter(self.graph.ids)
+
+    def __len__(self):
+        return len(self.graph.ids)
+
+
+class Successors:
+    def __init__(self, graph, position):
+        self.graph = graph
+        self.u = position
+
+    def items(self):
+        ids, u = self.graph.ids, self.u
+        for (indptr, indices), edge_data in zip(self.graph.adjacency, self.graph.edge_data):
+            start, end = indptr[u:u + 2].tolist()
+            if start != end:
+                for v in indices[start:end].tolist():
+                    yield ids[v], edge_data
+
+    def __iter__(self):
+        ids, u = self.graph.ids, self.u
+        for indptr, indices in self.graph.adjacency:
+            start, end = indptr[u:u + 2].tolist()
+            if start != end:
+                for v in indices[start:end].tolist():
+                    yield ids[v]
+
+    def __len__(self):
+        u = self.u
+        return int(sum(indptr[u + 1] - indptr[u] for indptr, _ in self.graph.adjacency))
+
+    def __getitem__(self, target):
+        v = self.graph.position.get(target)
+        if v is not None:
+            u = self.u
+            for code, (indptr, indices) in enumerate(self.graph.adjacency):
+                row = indices[indptr[u]:indptr[u + 1]]
+                at = np.searchsorted(row, v)
+                if at < len(row) and row[at] == v:
+                    return self.graph.edge_data[code]
+        raise KeyError(target)
+
+    def __contains__(self, target):
+        try:
+            self[target]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, target, default=None):
+        try:
+            return self[target]
+        except KeyError:
+            return default
+
+
+def build_csr_graph_from_config(schema_path, data_paths, date_range=None):
+    """
+    Builds a CSRGraph straight from the data sources, without going through
+    networkx: same nodes, node attributes and edges as
+    build_knowledge_graph_from_config, but node ids are interned once and
+    edges are kept as integer arrays.
+    """
+    with open(schema_path, 'r') as f:
+        config = json.load(f)
+
+    shards = [
+        extract_shard((dataset, path, None, config, date_range))
+        for dataset, path in data_paths.items()
+    ]
+
+    # 1. Nodes in first-seen order across datasets, typed by the first column they appear in.
+    found = [shard["nodes"] for shard in shards if shard["nodes"] is not None]
+    all_ids = np.concatenate([ids for ids, _, _ in found]) if found else np.zeros(0, dtype=object)
+    all_types = [types[code] for _, codes, types in found for code in codes.tolist()]
+    first = np.flatnonzero(~pd.Index(all_ids).duplicated(keep="first"))
+    ids = all_ids[first].tolist()
+    type_values = [all_types[i] for i in first.tolist()]
+
+    # 2. Edge endpoints to positions; ids only seen on edges become untyped nodes, as in networkx.
+    edge_parts = []
+    for i, edge in enumerate(config['edges']):
+        for shard in shards:
+            if i in shard["edges"]:
+                sources, targets, edge_ids = shard["edges"][i]
+                edge_parts.append((edge['relation'], edge_ids[sources], edge_ids[targets]))
+
+    relations = list(dict.fromkeys(relation for relation, _, _ in edge_parts))
+    if len(relations) > 255:
+        raise ValueError("CSRGraph supports at most 255 distinct edge relations.")
+
+    known = pd.Index(ids)
+    extra = []
+    for _, edge_sources, edge_targets in edge_parts:
+        endpoints = np.stack([edge_sources, edge_targets], axis=1).ravel()
+        unseen = endpoints[known.get_indexer(endpoints) < 0]
+        if len(unseen):
+            unseen = unseen[~pd.Index(unseen).duplicated(keep="first")]
+            extra.extend(unseen.tolist())
+            known = pd.Index(ids + extra)
+    num_typed = len(ids)
+    ids = ids + extra
+
+    position_of = pd.Index(ids)
+    sources = np.concatenate([position_of.get_indexer(s) for _, s, _ in edge_parts]) if edge_parts else []
+    targets = np.concatenate([position_of.get_indexer(t) for _, _, t in edge_parts]) if edge_parts else []
+    codes = np.concatenate([
+        np.full(len(s), relations.index(relation), dtype=np.uint8) for relation, s, _ in edge_parts
+    ]) if edge_parts else []
+
+    # 3. Node attributes: type for schema nodes, demographics for users (later rows win).
+    n = len(ids)
+    type_codes, type_categories = pd.factorize(pd.Series(type_values, dtype=object))
+    type_state = np.full(n, ABSENT, dtype=np.uint8)
+    type_state[:num_typed] = VALUE
+    type_column = np.full(n, -1, dtype=np.int32)
+    type_column[:num_typed] = type_codes
+    attributes = {"type": AttributeColumn(type_state, type_column, list(type_categories))}
+
+    users = [shard["users"] for shard in shards if shard["users"] is not None]
+    if users:
+        attributes.update(user_attribute_columns(pd.concat(users, ignore_index=True), position_of, n))
+
+    return CSRGraph.from_edges(ids, attributes, relations, sources, targets, codes)
+
+
+def user_attribute_columns(users_df, position_of, n):
+    """age / gender / location columns set on the users found in the graph, as add_user_attributes does."""
+    users = users_df.drop_duplicates("user_id", keep="last")
+    positions = position_of.get_indexer(users["user_id"])
+    found = positions >= 0
+    users, positions = users[found], positions[found]
+
+    columns = {}
+    for key in USER_ATTRIBUTE_COLUMNS[1:]:
+        values = users[key]
+        state = np.full(n, ABSENT, dtype=np.uint8)
+        state[positions] = np.where(values.notna(), VALUE, NONE)
+        if key == "age":
+            ints = np.zeros(n, dtype=np.int64)
+            ints[positions[values.notna().to_numpy()]] = values.dropna().astype(np.int64).to_numpy()
+            columns[key] = AttributeColumn(state, ints)
+        else:
+            codes, categories = pd.factorize(values.astype(object), use_na_sentinel=True)
+            column = np.full(n, -1, dtype=np.int32)
+            column[positions] = codes
+            columns[key] = AttributeColumn(state, column, list(categories))
+    return columns
@@ -0,0 +1,229 @@
+# src/data_sources.py
+
+import io
+import os
+
+import pandas as pd
+
+# File extension → source format. The schema can override it per dataset.
+FORMATS_BY_EXTENSION = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "ipc",
+    ".feather": "ipc",
+    ".ipc": "ipc",
+}
+
+# Columns add_user_attributes reads from the users dataset.
+USER_ATTRIBUTE_COLUMNS = ["user_id", "age", "gender", "location"]
+
+
+def dataset_options(config, dataset_name):
+    """
+    Optional per-dataset settings from the schema's "datasets" section, e.g.
+
+        "datasets": {"orders": {"format": "parquet", "date_column": "order_date"}}
+    """
+    return config.get("datasets", {}).get(dataset_name, {})
+
+
+def source_format(path, options=None):
+    fmt = (options or {}).get("format")
+    if fmt is None:
+        fmt = FORMATS_BY_EXTENSION.get(os.path.splitext(path)[1].lower())
+    if fmt not in ("csv", "parquet", "ipc"):
+        raise ValueError(f"Cannot tell the format of data source {path!r}; set \"format\" to csv, parquet or ipc in the schema's datasets section.")
+    return fmt
+
+
+def dataset_columns(config, dataset_name):
+    """Every column of a dataset the graph builder reads: node ids, edge endpoints and user attributes."""
+    columns = list(config['nodes'])
+    for edge in config['edges']:
+        if edge['via'] == dataset_name:
+            columns += [edge['from'], edge['to']]
+    if dataset_name == "users":
+        columns += USER_ATTRIBUTE_COLUMNS
+    return list(dict.fromkeys(columns))
+
+
+def dataset_shards(path, options=None, shard_bytes=64 * 2**20):
+    """
+    Splits a dataset into byte ranges of about shard_bytes for parallel
+    reads. Only CSVs are split, at line starts (so quoted fields must not
+    contain newlines); other sources, and small CSVs, are a single [None]
+    shard meaning "the whole source".
+    """
+    if source_format(path, options) != "csv" or os.path.getsize(path) <= shard_bytes:
+        return [None]
+
+    size = os.path.getsize(path)
+    bounds = []
+    with open(path, 'rb') as f:
+        f.readline()
+        bounds.append(f.tell())
+        while True:
+            f.seek(bounds[-1] + shard_bytes)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def read_dataset(path, columns, options=None, date_range=None, byte_range=None):
+    """
+    Reads the given columns of one dataset (those that exist in the source)
+    into a DataFrame. With a date_range and a "date_column" in options, only
+    rows with start <= date < end are kept; for Parquet / Arrow sources the
+    filter is pushed down into the scan. byte_range limits a CSV read to one
+    of its dataset_shards.
+    """
+    chunks = list(iter_dataset_chunks(path, columns, None, options, date_range, byte_range))
+    if len(chunks) == 1:
+        return chunks[0]
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
+
+def iter_dataset_chunks(path, columns, chunksize, options=None, date_range=None, byte_range=None):
+    """
+    Yields one dataset as DataFrames of at most chunksize rows (the whole
+    source at once when chunksize is None), projected and date-filtered like
+    read_dataset. Nothing is yielded if none of the columns exist.
+    """
+    options = options or {}
+    date_column = options.get("date_column") if date_range is not None else None
+    fmt = source_format(path, options)
+
+    if fmt == "csv":
+        yield from iter_csv_chunks(path, columns, chunksize, date_column, date_range, byte_range)
+    elif byte_range is not None:
+        raise ValueError(f"Byte ranges only apply to CSV sources, not {path!r}")
+    else:
+        yield from iter_arrow_chunks(path, fmt, columns, chunksize, date_column, date_range)
+
+
+def iter_csv_chunks(path, columns, chunksize, date_column, date_range, byte_range=None):
+    if byte_range is not None:
+        # The header line plus the shard's rows parse like a small CSV file.
+        with open(path, 'rb') as f:
+            header_line = f.readline()
+            f.seek(byte_range[0])
+            source = io.BytesIO(header_line + f.read(byte_range[1] - byte_range[0]))
+    else:
+        source = path
+
+    header = pd.read_csv(path, nrows=0).columns
+    wanted = [col for col in dict.fromkeys(columns) if col in header]
+    if not wanted:
+        return
+    if date_column is not None and date_column not in header:
+        raise ValueError(f"Date column '{date_column}' not found in {path}")
+    read = set(wanted) | ({date_column} if date_column else set())
+
+    def project(chunk):
+        if date_column is not None:
+            chunk = chunk[in_date_range(pd.to_datetime(chunk[date_column]), date_range)]
+        return chunk[wanted].reset_index(drop=True)
+
+    if chunksize is None:
+        yield project(pd.read_csv(source, usecols=lambda col: col in read))
+        return
+    with pd.read_csv(source, usecols=lambda col: col in read, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield project(chunk)
+
+
+def iter_arrow_chunks(path, fmt, columns, chunksize, date_column, date_range):
+    try:
+        import pyarrow.dataset as ds
+    except ImportError:
+        raise ImportError(f"Reading {fmt} data sources needs pyarrow: pip install pyarrow") from None
+
+    dataset = ds.dataset(path, format=fmt)
+    names = dataset.schema.names
+    wanted = [col for col in dict.fromkeys(columns) if col in names]
+    if not wanted:
+        return
+
+    expression = None
+    exact = True
+    if date_column is not None:
+        if date_column not in names:
+            raise ValueError(f"Date column '{date_column}' not found in {path}")
+        arrow_type = dataset.schema.field(date_column).type
+        expression = date_filter(ds.field(date_column), arrow_type, date_range)
+        # String dates are only narrowed to whole days by the scan; the exact
+        # bounds are applied after parsing them, as for CSVs.
+        exact = not is_string_type(arrow_type)
+    read = wanted if exact or date_column in wanted else wanted + [date_column]
+
+    def project(frame):
+        if exact:
+            return frame
+        frame = frame[in_date_range(pd.to_datetime(frame[date_column]), date_range)]
+        return frame[wanted].reset_index(drop=True)
+
+    if chunksize is None:
+        yield project(dataset.to_table(columns=read, filter=expression).to_pandas())
+        return
+    for batch in dataset.to_batches(columns=read, filter=expression, batch_size=chunksize):
+        if batch.num_rows:
+            chunk = project(batch.to_pandas())
+            if len(chunk):
+                yield chunk
+
+
+def in_date_range(dates, date_range):
+    start, end = date_range
+    keep = dates.notna()
+    if start is not None:
+        keep &= dates >= pd.Timestamp(start)
+    if end is not None:
+        keep &= dates < pd.Timestamp(end)
+    return keep
+
+
+def is_string_type(arrow_type):
+    import pyarrow as pa
+
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+def date_filter(field, arrow_type, date_range):
+    """
+    Arrow filter expression for start <= field < end. Date / timestamp
+    columns compare against typed scalars. String columns are assumed to
+    hold ISO-8601 dates ("2024-01-05", "2024-01-05 12:00", "2024-01-05T12:00"
+    ...) and are compared as strings on whole days only: every row whose
+    date falls in [start, end) passes, and the caller must apply the exact
+    bounds after parsing (see iter_arrow_chunks).
+    """
+    import pyarrow as pa
+
+    def bound(value, upper):
+        ts = pd.Timestamp(value)
+        if pa.types.is_timestamp(arrow_type):
+            if arrow_type.tz is not None:
+                ts = ts.tz_localize(arrow_type.tz) if ts.tz is None else ts.tz_convert(arrow_type.tz)
+            return pa.scalar(ts.to_pydatetime(), type=arrow_type)
+        if pa.types.is_date(arrow_type):
+            return pa.scalar(ts.date(), type=arrow_type)
+        if is_string_type(arrow_type):
+            day = ts.normalize()
+            if upper and day != ts:
+                day += pd.Timedelta(days=1)
+            return day.strftime("%Y-%m-%d")
+        raise ValueError(f"Cannot filter dates on a column of type {arrow_type}")
+
+    start, end = date_range
+    expression = field.is_valid()
+    if start is not None:
+        expression &= field >= bound(start, upper=False)
+    if end is not None:
+        expression &= field < bound(end, upper=True)
+    return expression
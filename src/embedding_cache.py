@@ -0,0 +1,194 @@
+# src/embedding_cache.py
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+
+def normalize_term(term):
+    """Cache key for a term: lowercased, whitespace collapsed."""
+    return " ".join(str(term).lower().split())
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk embeddings for one model, keyed by normalized term.
+
+    Layout under <cache_dir>/<model slug>/:
+      meta.json    — model name and embedding dimension
+      vectors.f32  — float32 rows, one per term, memory-mapped on load
+      terms.txt    — one normalized term per line, in row order
+
+    New terms are encoded in one batch and appended to both files, so the
+    store grows incrementally as new tags or genres show up. The files may
+    be shared by several processes: appends hold an exclusive lock on
+    <path>/lock and first reload whatever other writers appended, so row
+    positions always match the files.
+    """
+
+    def __init__(self, cache_dir, model_name):
+        self.model_name = model_name
+        self.path = os.path.join(cache_dir, model_slug(model_name))
+        self.lock = threading.Lock()
+        if os.path.exists(self.path):
+            with self.file_lock():
+                self.load()
+        else:
+            self.load()
+
+    @property
+    def vectors_path(self):
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def terms_path(self):
+        return os.path.join(self.path, "terms.txt")
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.path, "meta.json")
+
+    @contextmanager
+    def file_lock(self):
+        """Exclusive lock on the store's files, across processes."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "lock"), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def stale(self):
+        """True if another process or store instance appended since load()."""
+        if self.dim is None:
+            return os.path.exists(self.meta_path)
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        return size != len(self.terms) * self.dim * 4
+
+    def load(self):
+        """Reads the store's files; call with file_lock() held once they exist."""
+        self.dim = None
+        self.terms = []
+        self.position = {}
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path, 'r') as f:
+            meta = json.load(f)
+        if meta.get("model_name") != self.model_name:
+            raise ValueError(f"Embedding store {self.path} belongs to model {meta.get('model_name')!r}, not {self.model_name!r}")
+        self.dim = meta["dim"]
+
+        terms = []
+        if os.path.exists(self.terms_path):
+            with open(self.terms_path, 'r', encoding='utf-8') as f:
+                terms = f.read().split("\n")[:-1]
+
+        # Vectors are written before their terms; drop rows whose term line
+        # never made it to disk so the next append stays aligned.
+        row_bytes = self.dim * 4
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        count = min(len(terms), size // row_bytes)
+        if size != count * row_bytes:
+            os.truncate(self.vectors_path, count * row_bytes)
+
+        self.terms = terms[:count]
+        self.position = {term: i for i, term in enumerate(self.terms)}
+        self.map_vectors()
+
+    def map_vectors(self):
+        count = len(self.terms)
+        if count:
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+        else:
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+
+    def get_many(self, terms, encode):
+        """
+        Embeddings for `terms` as a float32 array (one row per term). Terms not
+        in the store yet are passed to encode(list_of_terms) in one batch and
+        appended.
+        """
+        keys = [normalize_term(term) for term in terms]
+        if not keys:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        with self.lock:
+            missing = list(dict.fromkeys(key for key in keys if key not in self.position))
+            if missing:
+                vectors = np.asarray(encode(missing), dtype=np.float32).reshape(len(missing), -1)
+                with self.file_lock():
+                    if self.stale():
+                        self.load()
+                    # Another writer may have appended some of them meanwhile.
+                    fresh = [i for i, key in enumerate(missing) if key not in self.position]
+                    if fresh:
+                        self.append([missing[i] for i in fresh], vectors[fresh])
+            rows = [self.position[key] for key in keys]
+            return np.array(self.vectors[rows], dtype=np.float32).reshape(len(keys), self.dim)
+
+    def append(self, keys, vectors):
+        """Appends rows for new keys; call with file_lock() held and the store not stale()."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(keys), -1)
+        os.makedirs(self.path, exist_ok=True)
+
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            with open(self.meta_path, 'w') as f:
+                json.dump({"model_name": self.model_name, "dim": self.dim}, f)
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension changed from {self.dim} to {vectors.shape[1]} for {self.model_name!r}")
+
+        with open(self.vectors_path, 'ab') as f:
+            f.write(vectors.tobytes())
+        with open(self.terms_path, 'a', encoding='utf-8') as f:
+            f.writelines(key + "\n" for key in keys)
+
+        for key in keys:
+            self.position[key] = len(self.terms)
+            self.terms.append(key)
+        self.map_vectors()
+
+
+class LRUCache:
+    """A small thread-safe least-recently-used mapping holding at most maxsize entries."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.data:
+                return default
+            self.data.move_to_end(key)
+            return self.data[key]
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def __len__(self):
+        return len(self.data)
+
+
+def model_slug(model_name):
+    """Directory name for a model: readable prefix plus a short hash of the full name."""
+    readable = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)[:64]
+    return f"{readable}-{hashlib.sha1(model_name.encode('utf-8')).hexdigest()[:8]}"
@@ -1,54 +1,328 @@
 import pandas as pd
-import networkx as nx
+import numpy as np
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-def build_knowledge_graph_from_config(schema_path, data_paths):
+try:
+    from .data_sources import (
+        USER_ATTRIBUTE_COLUMNS, dataset_columns, dataset_options, dataset_shards, iter_dataset_chunks, read_dataset,
+    )
+    from .relation_graph import RelationDiGraph
+except ImportError:
+    from data_sources import (
+        USER_ATTRIBUTE_COLUMNS, dataset_columns, dataset_options, dataset_shards, iter_dataset_chunks, read_dataset,
+    )
+    from relation_graph import RelationDiGraph
+
+DEFAULT_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "graph_schema.json")
+
+
+def build_knowledge_graph_from_config(schema_path, data_paths, chunksize=None, date_range=None, workers=None):
     """
     schema_path: str — path to graph_schema.json
     data_paths: dict — keys like 'users', 'orders', 'products', 'streaming'
-                       values are file paths to CSVs
+                       values are file paths to CSV, Parquet or Arrow IPC
+                       files (see data_sources)
+    chunksize: int — if set, stream the sources in chunks of this many rows
+                     instead of loading whole dataframes (see
+                     build_knowledge_graph_streaming)
+    date_range: (start, end) — if set, only rows with start <= date < end
+                are read from datasets that declare a "date_column" in the
+                schema's "datasets" section; either bound may be None
+    workers: int — if set, parse datasets and CSV shards in a process pool
+             of this size (see build_knowledge_graph_parallel)
+
+    Only the columns the schema refers to are read. Builds the graph with
+    column-level pandas operations and batched add_nodes_from/add_edges_from
+    calls. The result (nodes, attributes, edges and insertion order) matches
+    the row-by-row reference builder in benchmarks/bench_graph_build.py.
     """
+    if chunksize is not None and workers is not None:
+        raise ValueError("chunksize (streaming) and workers (parallel) builds cannot be combined.")
+    if chunksize is not None:
+        return build_knowledge_graph_streaming(schema_path, data_paths, chunksize, date_range)
+    if workers is not None:
+        return build_knowledge_graph_parallel(schema_path, data_paths, workers, date_range=date_range)
+
     with open(schema_path, 'r') as f:
         config = json.load(f)
 
-    G = nx.DiGraph()
+    G = RelationDiGraph()
 
     # Load all datasets
-    dataframes = {k: pd.read_csv(v) for k, v in data_paths.items()}
+    dataframes = {
+        k: read_dataset(v, dataset_columns(config, k), dataset_options(config, k), date_range)
+        for k, v in data_paths.items()
+    }
 
     # 1. Create all nodes from schema
     for dataset_name, df in dataframes.items():
-        for _, row in df.iterrows():
-            for col, node_type in config['nodes'].items():
-                if col in row:
-                    node_id = row[col]
-                    if not G.has_node(node_id):
-                        G.add_node(node_id, type=node_type)
+        add_schema_nodes(G, df, config['nodes'])
 
     # 2. Inject attributes for user nodes
     if "users" in dataframes:
-        for _, row in dataframes["users"].iterrows():
-            user_id = row["user_id"]
-            if G.has_node(user_id):
-                G.nodes[user_id]["age"] = int(row["age"]) if not pd.isna(row["age"]) else None
-                G.nodes[user_id]["gender"] = row["gender"] if not pd.isna(row["gender"]) else None
-                G.nodes[user_id]["location"] = row["location"] if not pd.isna(row["location"]) else None
+        add_user_attributes(G, dataframes["users"])
 
     # 3. Add edges
     for edge in config['edges']:
-        src_col = edge['from']
-        tgt_col = edge['to']
-        relation = edge['relation']
         dataset = edge['via']
 
         if dataset not in dataframes:
             continue
 
-        for _, row in dataframes[dataset].iterrows():
-            if src_col in row and tgt_col in row:
-                G.add_edge(row[src_col], row[tgt_col], relation=relation)
+        add_schema_edges(G, dataframes[dataset], edge)
+
+    print("✅ Graph successfully created")
+    print("Number of nodes:", G.number_of_nodes())
+    print("Number of edges:", G.number_of_edges())
+    return G
+
+
+def build_knowledge_graph_streaming(schema_path, data_paths, chunksize=100_000, date_range=None):
+    """
+    Same graph as build_knowledge_graph_from_config, but each source is read
+    in chunks of `chunksize` rows and only the columns a step needs, so peak
+    memory is one chunk plus the graph itself rather than every dataframe.
+
+    Files are read once per step (nodes, user attributes, each edge), in
+    the same order as the in-memory builder.
+    """
+    with open(schema_path, 'r') as f:
+        config = json.load(f)
+
+    G = RelationDiGraph()
+    node_config = config['nodes']
+
+    def chunks(dataset, columns):
+        return iter_dataset_chunks(data_paths[dataset], columns, chunksize, dataset_options(config, dataset), date_range)
+
+    # 1. Create all nodes from schema
+    for dataset in data_paths:
+        for chunk in chunks(dataset, list(node_config)):
+            add_schema_nodes(G, chunk, node_config)
+
+    # 2. Inject attributes for user nodes; later chunks overwrite earlier ones,
+    #    like later rows do within a chunk.
+    if "users" in data_paths:
+        for chunk in chunks("users", USER_ATTRIBUTE_COLUMNS):
+            add_user_attributes(G, chunk)
+
+    # 3. Add edges
+    for edge in config['edges']:
+        dataset = edge['via']
+
+        if dataset not in data_paths:
+            continue
+
+        for chunk in chunks(dataset, [edge['from'], edge['to']]):
+            add_schema_edges(G, chunk, edge)
 
     print("✅ Graph successfully created")
     print("Number of nodes:", G.number_of_nodes())
     print("Number of edges:", G.number_of_edges())
     return G
+
+
+def build_knowledge_graph_parallel(schema_path, data_paths, workers=None, shard_bytes=64 * 2**20, date_range=None):
+    """
+    Same graph as build_knowledge_graph_from_config, with the parsing and
+    node/edge extraction of every dataset (and of every ~shard_bytes shard
+    of a large CSV) done in a pool of `workers` processes (all cores if
+    None). Workers return factorized id arrays; the main process merges
+    them into the networkx graph in dataset and shard order, so node and
+    edge order match a sequential build.
+    """
+    with open(schema_path, 'r') as f:
+        config = json.load(f)
+
+    tasks = [
+        (dataset, path, byte_range, config, date_range)
+        for dataset, path in data_paths.items()
+        for byte_range in dataset_shards(path, dataset_options(config, dataset), shard_bytes)
+    ]
+
+    G = RelationDiGraph()
+    shards = []
+
+    # 1. Create all nodes from schema, merging each shard as soon as it is ready.
+    if workers == 1:
+        extracted = map(extract_shard, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        extracted = pool.map(extract_shard, tasks)
+    try:
+        for shard in extracted:
+            merge_shard_nodes(G, shard)
+            shards.append(shard)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # 2. Inject attributes for user nodes, later shards winning.
+    for shard in shards:
+        if shard["users"] is not None:
+            add_user_attributes(G, shard["users"])
+
+    # 3. Add edges, schema edge by schema edge.
+    for i, edge in enumerate(config['edges']):
+        for shard in shards:
+            if i in shard["edges"]:
+                sources, targets, ids = shard["edges"][i]
+                G.add_edges_from(zip(ids[sources].tolist(), ids[targets].tolist()), relation=edge['relation'])
+
+    print("✅ Graph successfully created")
+    print("Number of nodes:", G.number_of_nodes())
+    print("Number of edges:", G.number_of_edges())
+    return G
+
+
+def extract_shard(task):
+    """
+    Process-pool worker: reads one dataset, or one CSV shard of it, and
+    returns its nodes, user attributes and edges for the merge steps of
+    build_knowledge_graph_parallel:
+
+      nodes: (ids in first-seen order, node type per id, as strings once)
+      users: user attribute rows, or None if this is not the users dataset
+      edges: schema edge position → (source codes, target codes, ids)
+    """
+    dataset, path, byte_range, config, date_range = task
+    node_config = config['nodes']
+    df = read_dataset(path, dataset_columns(config, dataset), dataset_options(config, dataset), date_range, byte_range)
+    shard = {"nodes": None, "users": None, "edges": {}}
+
+    # Same first-seen order as add_schema_nodes: row by row, column by column.
+    cols = [col for col in node_config if col in df.columns]
+    if cols and not df.empty:
+        flat = df[cols].to_numpy(dtype=object).ravel()
+        first = np.flatnonzero(~pd.Index(flat).duplicated(keep="first"))
+        shard["nodes"] = (flat[first], (first % len(cols)).astype(np.uint8), [node_config[col] for col in cols])
+
+    if dataset == "users":
+        shard["users"] = df[[col for col in USER_ATTRIBUTE_COLUMNS if col in df.columns]]
+
+    for i, edge in enumerate(config['edges']):
+        if edge['via'] != dataset or edge['from'] not in df.columns or edge['to'] not in df.columns:
+            continue
+        codes, ids = pd.factorize(
+            np.concatenate([df[edge['from']].to_numpy(dtype=object), df[edge['to']].to_numpy(dtype=object)]),
+            use_na_sentinel=False,
+        )
+        codes = codes.astype(np.int32)
+        shard["edges"][i] = (codes[:len(df)], codes[len(df):], np.asarray(ids, dtype=object))
+
+    return shard
+
+
+def merge_shard_nodes(G, shard):
+    if shard["nodes"] is None:
+        return
+    ids, type_codes, types = shard["nodes"]
+    G.add_nodes_from(
+        (node_id, {"type": types[code]})
+        for node_id, code in zip(ids.tolist(), type_codes.tolist())
+        if node_id not in G
+    )
+
+
+def apply_delta(graph, dataset_name, new_rows, schema_path=DEFAULT_SCHEMA_PATH, index=None, matcher=None, profiles=None):
+    """
+    Adds new rows of one dataset (e.g. the day's orders or streaming events)
+    to an existing graph, following the schema like a full build would.
+
+    new_rows: DataFrame or list of dicts with the dataset's columns
+    index: GraphIndex to update in place (optional)
+    matcher: SemanticMatcher whose vocabulary gets the new tags/genres (optional)
+    profiles: InterestProfiles whose entries for affected users are dropped (optional)
+
+    Only the new rows are read, so the cost scales with the delta rather
+    than the graph. Returns the number of edges in the delta.
+    """
+    with open(schema_path, 'r') as f:
+        config = json.load(f)
+
+    df = new_rows if isinstance(new_rows, pd.DataFrame) else pd.DataFrame(new_rows)
+    node_config = config['nodes']
+
+    cols = [col for col in node_config if col in df.columns]
+    candidates = df[cols].to_numpy(dtype=object).ravel().tolist() if cols else []
+    new_nodes = [node for node in dict.fromkeys(candidates) if node not in graph]
+    add_schema_nodes(graph, df, node_config)
+
+    changed_users = []
+    if dataset_name == "users":
+        add_user_attributes(graph, df)
+        changed_users = df["user_id"].tolist()
+
+    new_edges = []
+    for edge in config['edges']:
+        if edge['via'] != dataset_name or edge['from'] not in df.columns or edge['to'] not in df.columns:
+            continue
+        add_schema_edges(graph, df, edge)
+        pairs = zip(df[edge['from']].tolist(), df[edge['to']].tolist())
+        new_edges.extend((source, target, edge['relation']) for source, target in pairs)
+
+    if index is not None:
+        index.update(graph, new_nodes, new_edges, changed_users)
+    if matcher is not None:
+        matcher.update(new_edges)
+    if profiles is not None:
+        profiles.update(new_edges)
+    return len(new_edges)
+
+
+def add_schema_nodes(G, df, node_config):
+    """
+    Adds one node per unique id found in the schema columns of df.
+
+    Ids are visited row by row, column by column (schema order), so the first
+    column an id appears in decides its type — same as the row-wise builder.
+    """
+    cols = [col for col in node_config if col in df.columns]
+    if not cols or df.empty:
+        return
+
+    ids = df[cols].to_numpy(dtype=object).ravel()
+    types = [node_config[col] for col in cols] * len(df)
+    first_seen = ~pd.Index(ids).duplicated(keep="first")
+
+    G.add_nodes_from(
+        (node_id, {"type": types[i]})
+        for i, node_id in zip(first_seen.nonzero()[0].tolist(), ids[first_seen].tolist())
+        if node_id not in G
+    )
+
+
+def add_user_attributes(G, users_df):
+    """
+    Sets age/gender/location on existing user nodes. Later rows win.
+    """
+    users = users_df.drop_duplicates("user_id", keep="last")
+
+    ages = [None if pd.isna(a) else int(a) for a in users["age"].tolist()]
+    genders = users["gender"].astype(object).where(users["gender"].notna(), None).tolist()
+    locations = users["location"].astype(object).where(users["location"].notna(), None).tolist()
+
+    G.add_nodes_from(
+        (user_id, {"age": age, "gender": gender, "location": location})
+        for user_id, age, gender, location in zip(users["user_id"].tolist(), ages, genders, locations)
+        if user_id in G
+    )
+
+
+def add_schema_edges(G, df, edge):
+    """
+    Adds every (from, to) pair of one schema edge definition found in df.
+    """
+    src_col = edge['from']
+    tgt_col = edge['to']
+
+    if src_col not in df.columns or tgt_col not in df.columns:
+        return
+
+    G.add_edges_from(
+        zip(df[src_col].tolist(), df[tgt_col].tolist()),
+        relation=edge['relation']
+    )
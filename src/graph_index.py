@@ -0,0 +1,296 @@
+# src/graph_index.py
+
+import json
+
+import numpy as np
+
+try:
+    from .relation_graph import activity_items, item_interests, relation_edges_of, relation_successors_of
+except ImportError:
+    from relation_graph import activity_items, item_interests, relation_edges_of, relation_successors_of
+
+# User attributes kept as columns in the UserTable (see rule_compiler.USER_FIELDS).
+USER_COLUMNS = ("age", "gender", "location", "education_level")
+
+
+class GraphIndex:
+    """
+    Lookup structures built once next to the graph and reused across queries.
+
+    Users are numbered densely by their position in `users`; every mask and
+    position array below is indexed that way.
+
+    users: tuple of user node ids, in graph order
+    user_position: user id → position
+    users_by_interest: lowercased interest → sorted int array of the positions
+                       of users that reach it through an activity edge
+                       (purchased/watched) followed by an interest edge
+                       (tagged_as/about)
+    user_table: columnar UserTable of the users' demographic attributes
+    """
+
+    def __init__(self, users, users_by_interest, user_table, activity_relations, interest_relations):
+        self.users = users
+        self.user_position = {user: i for i, user in enumerate(users)}
+        self.users_by_interest = users_by_interest
+        self.user_table = user_table
+        self.activity_relations = activity_relations
+        self.interest_relations = interest_relations
+
+    def update(self, graph, new_nodes, new_edges, changed_users=()):
+        """
+        Brings the index up to date after nodes and edges were added to graph
+        (see graph_builder.apply_delta), touching only what they affect.
+
+        new_nodes: node ids that were not in the graph before
+        new_edges: (source, target, relation) triples that were added
+        changed_users: existing user ids whose attributes were rewritten
+
+        New users get the next positions, so masks built before the update
+        are shorter than ones built after it; Audiences built before it are
+        zero-padded when combined with newer ones.
+        """
+        nodes = graph.nodes
+        new_users = [node for node in new_nodes if nodes[node].get("type") == "user"]
+        if new_users:
+            start = len(self.users)
+            self.users = self.users + tuple(new_users)
+            self.user_position.update((user, start + i) for i, user in enumerate(new_users))
+
+        refresh = list(dict.fromkeys(
+            [user for user in changed_users if user in self.user_position] + new_users
+        ))
+        if refresh:
+            self.user_table.update(graph, self.users, [self.user_position[user] for user in refresh])
+
+        # Interests gained through the new edges, as interest → user positions.
+        successors, pred = relation_successors_of(graph), graph.pred
+        added = {}
+        for source, target, relation in new_edges:
+            if relation in self.activity_relations and source in self.user_position:
+                position = self.user_position[source]
+                for interest in item_interests(successors, target, self.interest_relations):
+                    if isinstance(interest, str):
+                        added.setdefault(interest.lower(), set()).add(position)
+            if relation in self.interest_relations and isinstance(target, str):
+                for user, edge_data in pred[source].items():
+                    if edge_data.get("relation") in self.activity_relations and user in self.user_position:
+                        added.setdefault(target.lower(), set()).add(self.user_position[user])
+
+        for interest, positions in added.items():
+            found = np.sort(np.fromiter(positions, dtype=np.int64, count=len(positions)))
+            existing = self.users_by_interest.get(interest)
+            if existing is None:
+                self.users_by_interest[interest] = found
+                continue
+            # Both sides are sorted: insert the positions not there yet in place.
+            at = np.searchsorted(existing, found)
+            fresh = at == len(existing)
+            fresh[~fresh] = existing[at[~fresh]] != found[~fresh]
+            self.users_by_interest[interest] = np.insert(existing, at[fresh], found[fresh])
+
+    def interest_mask(self, interests):
+        """Boolean mask of the users reaching any of the given lowercased interests."""
+        mask = np.zeros(len(self.users), dtype=bool)
+        for interest in interests:
+            positions = self.users_by_interest.get(interest)
+            if positions is not None:
+                mask[positions] = True
+        return mask
+
+
+class IntColumn:
+    """An integer attribute: values plus a mask of users that have one."""
+
+    def __init__(self, values, present):
+        self.values = values
+        self.present = present
+
+    def mask(self, cond):
+        values = self.values
+
+        if cond.compare is not None:
+            hit = cond.compare(values, cond.value)
+        else:
+            hit = np.zeros(len(values), dtype=bool)
+
+        # Same fallback order as the per-user predicate: "equals" wins over "in".
+        if cond.has_equals:
+            if is_number(cond.equals):
+                hit |= values == cond.equals
+        elif cond.has_in:
+            numbers = [v for v in cond.in_values if is_number(v)]
+            if numbers:
+                hit |= np.isin(values, numbers)
+
+        return hit & self.present
+
+    def updated(self, size, positions, values):
+        """
+        Column grown to `size` users with `values` set at `positions`, or None
+        if a value is not an int and the column has to become categorical.
+        """
+        if not all(v is None or (isinstance(v, (int, np.integer)) and not isinstance(v, bool)) for v in values):
+            return None
+        column_values = np.zeros(size, dtype=np.int64)
+        present = np.zeros(size, dtype=bool)
+        column_values[:len(self.values)] = self.values
+        present[:len(self.present)] = self.present
+        column_values[positions] = [0 if v is None else v for v in values]
+        present[positions] = [v is not None for v in values]
+        return IntColumn(column_values, present)
+
+
+class CategoricalColumn:
+    """
+    A string-like attribute stored as int32 codes into `categories`
+    (-1 for users without a value).
+    """
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    def mask(self, cond):
+        # Run the condition once per distinct value, then gather by code; the
+        # trailing False is what code -1 (missing) picks up.
+        table = np.array(
+            [bool(cond.predicate({cond.field: category}, None)) for category in self.categories] + [False],
+            dtype=bool,
+        )
+        return table[self.codes]
+
+    def updated(self, size, positions, values):
+        """Column grown to `size` users with `values` set at `positions`; new values become new categories."""
+        categories = list(self.categories)
+        code_of = {category: code for code, category in enumerate(categories)}
+        new_codes = []
+        for value in values:
+            if is_missing(value):
+                new_codes.append(-1)
+                continue
+            if value not in code_of:
+                code_of[value] = len(categories)
+                categories.append(value)
+            new_codes.append(code_of[value])
+
+        codes = np.full(size, -1, dtype=np.int32)
+        codes[:len(self.codes)] = self.codes
+        codes[positions] = new_codes
+        return CategoricalColumn(codes, categories)
+
+
+class UserTable:
+    """
+    Columnar copy of the user nodes' attributes, one column per USER_COLUMNS
+    field, so demographic conditions become vectorized masks.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def mask(self, cond):
+        return self.columns[cond.field].mask(cond)
+
+    def update(self, graph, users, positions):
+        """Re-reads the attributes of the users at `positions` from graph, growing columns to len(users)."""
+        nodes = graph.nodes
+        for field, column in self.columns.items():
+            values = [nodes[users[i]].get(field) for i in positions]
+            updated = column.updated(len(users), positions, values)
+            if updated is None:
+                updated = build_column([nodes[user].get(field) for user in users])
+            self.columns[field] = updated
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not (isinstance(value, float) and np.isnan(value))
+
+
+def is_missing(value):
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+def encode_values(values, present):
+    """
+    Encodes the values at the positions where present is True: (int64 values,
+    None) when all of them are ints, (int32 codes, categories in first-seen
+    order) otherwise. Other positions get 0 / code -1.
+
+    Shared by the UserTable columns, graph snapshots and CSRGraph attributes.
+    """
+    if all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v, p in zip(values, present) if p):
+        return np.array([v if p else 0 for v, p in zip(values, present)], dtype=np.int64), None
+
+    categories = {}
+    codes = np.array(
+        [categories.setdefault(v, len(categories)) if p else -1 for v, p in zip(values, present)],
+        dtype=np.int32,
+    )
+    return codes, list(categories)
+
+
+def build_column(values):
+    """IntColumn when every present value is an int, CategoricalColumn otherwise."""
+    present = [not is_missing(v) for v in values]
+    encoded, categories = encode_values(values, present)
+    if categories is None:
+        return IntColumn(encoded, np.array(present, dtype=bool))
+    return CategoricalColumn(encoded, categories)
+
+
+def build_user_table(graph, users):
+    nodes = graph.nodes
+    return UserTable({
+        field: build_column([nodes[user].get(field) for user in users])
+        for field in USER_COLUMNS
+    })
+
+
+def load_schema(schema_path):
+    with open(schema_path, 'r') as f:
+        return json.load(f)
+
+
+def schema_relations(config):
+    """
+    Splits the schema's edge relations into the two hops of an interest walk:
+    activity relations leave a user column, interest relations end on an
+    interest column.
+    """
+    nodes = config["nodes"]
+    activity_relations = frozenset(e["relation"] for e in config["edges"] if nodes.get(e["from"]) == "user")
+    interest_relations = frozenset(e["relation"] for e in config["edges"] if nodes.get(e["to"]) == "interest")
+    return activity_relations, interest_relations
+
+
+def build_graph_index(graph, schema_path):
+    """
+    Builds a GraphIndex for a graph created by build_knowledge_graph_from_config
+    with the same graph_schema.json.
+    """
+    activity_relations, interest_relations = schema_relations(load_schema(schema_path))
+
+    users = tuple(node for node, data in graph.nodes(data=True) if data.get("type") == "user")
+
+    edges = relation_edges_of(graph)
+    interests_by_item = {}
+    for relation in interest_relations:
+        for item, target in edges(relation):
+            if isinstance(target, str):
+                interests_by_item.setdefault(item, set()).add(target.lower())
+
+    users_by_interest = {}
+    successors = relation_successors_of(graph)
+    for position, user in enumerate(users):
+        for item in activity_items(successors, user, activity_relations):
+            for interest in interests_by_item.get(item, ()):
+                users_by_interest.setdefault(interest, set()).add(position)
+
+    return GraphIndex(
+        users,
+        {interest: np.array(sorted(found), dtype=np.int64) for interest, found in users_by_interest.items()},
+        build_user_table(graph, users),
+        activity_relations,
+        interest_relations,
+    )
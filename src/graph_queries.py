@@ -1,4 +1,22 @@
-def apply_persona_to_graph(graph, persona_rule):
+import numpy as np
+
+try:
+    from .audience import Audience
+    from .relation_graph import ACTIVITY_RELATIONS, INTEREST_RELATIONS, interest_walk, relation_edges_of, relation_successors_of
+    from .rule_compiler import compile_rule, compile_rules
+    from .rule_planner import explain_plan, plan_rule, plan_rules
+except ImportError:
+    from audience import Audience
+    from relation_graph import ACTIVITY_RELATIONS, INTEREST_RELATIONS, interest_walk, relation_edges_of, relation_successors_of
+    from rule_compiler import compile_rule, compile_rules
+    from rule_planner import explain_plan, plan_rule, plan_rules
+
+
+def apply_persona_to_graph(graph, persona_rule, index=None):
+    """
+    Returns the set of user nodes matching a flat persona rule, or an Audience
+    over the index's users when a GraphIndex is given.
+    """
     matched_users = set()
 
     for node, data in graph.nodes(data=True):
@@ -41,20 +59,63 @@ def apply_persona_to_graph(graph, persona_rule):
             matched_users.add(node)
 
     # Now check graph relationships if tags or genres are in persona
+    items_by_interest = None
+    if index is None and ("tag" in persona_rule or "genre" in persona_rule):
+        # Normalized once, then shared by the tag and genre lookups.
+        items_by_interest = interest_items(graph)
     for rel_field in ["tag", "genre"]:
         if rel_field in persona_rule:
-            values = set(persona_rule[rel_field])
-            valid_users = set()
-            for u, node, edge_data in graph.edges(data=True):
-                if edge_data.get("relation") in ["purchased", "watched"]:
-                    for _, target, tdata in graph.out_edges(node, data=True):
-                        if tdata.get("relation") in ["tagged_as", "about"] and target.lower() in values:
-                            valid_users.add(u)
+            valid_users = users_with_interests(graph, set(persona_rule[rel_field]), index, items_by_interest)
             matched_users = matched_users & valid_users if matched_users else valid_users
 
+    if index is not None:
+        return Audience.from_users(index, matched_users)
     return matched_users
 
-def evaluate_condition(user_data, condition, matcher=None, field=None, graph=None, user_node=None):
+def interest_items(graph):
+    """
+    Lowercased interest → set of items with an interest edge (tagged_as/about)
+    to it, built in one pass over the interest edges.
+    """
+    items_by_interest = {}
+    edges = relation_edges_of(graph)
+    for relation in INTEREST_RELATIONS:
+        for item, interest in edges(relation):
+            if isinstance(interest, str):
+                items_by_interest.setdefault(interest.lower(), set()).add(item)
+    return items_by_interest
+
+def users_with_interests(graph, interests, index=None, items_by_interest=None):
+    """
+    User nodes with an activity edge (purchased/watched) to an item that has
+    an interest edge (tagged_as/about) to one of the given interests, compared
+    against the lowercased interest node.
+
+    With a GraphIndex the users come straight from its interest → users
+    reverse index. Without one, matching items are looked up in
+    items_by_interest (from interest_items(); built here when not given, so
+    pass it in when calling more than once) and their users found in one pass
+    over the activity edges.
+    """
+    if index is not None:
+        return {index.users[position] for position in np.flatnonzero(index.interest_mask(interests))}
+
+    if items_by_interest is None:
+        items_by_interest = interest_items(graph)
+    items = set()
+    for interest in interests:
+        items.update(items_by_interest.get(interest, ()))
+
+    users = set()
+    if items:
+        edges = relation_edges_of(graph)
+        for relation in ACTIVITY_RELATIONS:
+            for user, item in edges(relation):
+                if item in items:
+                    users.add(user)
+    return users
+
+def evaluate_condition(user_data, condition, matcher=None, field=None, graph=None, user_node=None, profiles=None):
     if field is None:
         field = condition.get("field")
 
@@ -65,14 +126,15 @@ def evaluate_condition(user_data, condition, matcher=None, field=None, graph=Non
         expanded_vals_extended = []
         for val in expanded_vals:
             expanded_vals_extended.extend([v.lower() for v in matcher.expand(val)])
-    
-        for _, mid_node, edge_data in graph.out_edges(user_node, data=True):
-            if edge_data.get("relation") in ["purchased", "watched"]:
-                for _, target_node, rel_data in graph.out_edges(mid_node, data=True):
-                    if rel_data.get("relation") in ["tagged_as", "about"]:
-                        if target_node.lower() in expanded_vals_extended:
-                            return True
-        return False
+
+        if profiles is not None:
+            return not set(expanded_vals_extended).isdisjoint(profiles.get(user_node))
+
+        successors = relation_successors_of(graph)
+        return any(
+            target_node.lower() in expanded_vals_extended
+            for _, target_node in interest_walk(successors, user_node)
+        )
 
     # Standard direct field checks
     value = user_data.get(field)
@@ -106,34 +168,87 @@ def evaluate_condition(user_data, condition, matcher=None, field=None, graph=Non
 
 
 
-def evaluate_logic_block(user_data, logic_block, matcher=None, graph=None, user_node=None):
+def evaluate_logic_block(user_data, logic_block, matcher=None, graph=None, user_node=None, profiles=None):
     if "and" in logic_block:
         return all(
-            evaluate_logic_block(user_data, cond, matcher, graph, user_node)
+            evaluate_logic_block(user_data, cond, matcher, graph, user_node, profiles)
             if isinstance(cond, dict) and ("and" in cond or "or" in cond)
-            else evaluate_condition(user_data, cond, matcher, cond.get("field"), graph, user_node)
+            else evaluate_condition(user_data, cond, matcher, cond.get("field"), graph, user_node, profiles)
             for cond in logic_block["and"]
         )
 
     elif "or" in logic_block:
         return any(
-            evaluate_logic_block(user_data, cond, matcher, graph, user_node)
+            evaluate_logic_block(user_data, cond, matcher, graph, user_node, profiles)
             if isinstance(cond, dict) and ("and" in cond or "or" in cond)
-            else evaluate_condition(user_data, cond, matcher, cond.get("field"), graph, user_node)
+            else evaluate_condition(user_data, cond, matcher, cond.get("field"), graph, user_node, profiles)
             for cond in logic_block["or"]
         )
 
     return False
 
 
-def apply_logical_rule(graph, rule, matcher=None):
+def apply_logical_rule(graph, rule, matcher=None, index=None, profiles=None, statistics=None):
+    """
+    Returns the set of user nodes matching rule["conditions"], or an Audience
+    when a GraphIndex is given.
+
+    The conditions are compiled once (see rule_compiler.compile_rule); invalid
+    rules raise RuleError. With a GraphIndex (graph_index.build_graph_index),
+    and/or trees are answered with vectorized boolean masks over the index's
+    interest sets and columnar user table instead of a per-user graph walk.
+    Without one, passing profiles (interest_profiles.InterestProfiles) lets
+    tag/genre conditions reuse each user's cached interest profile.
+
+    With statistics (rule_planner.collect_rule_statistics), and/or clauses
+    are reordered so cheap, selective ones run first; see explain_rule.
+    """
+    compiled = compile_rule(rule["conditions"], matcher, graph, profiles)
+    if statistics is not None:
+        compiled = plan_rule(compiled, statistics)
+    if index is not None:
+        return compiled.select(index)
+
+    predicate = compiled.predicate
     matched_users = set()
 
     for node, data in graph.nodes(data=True):
         if data.get("type") != "user":
             continue
 
-        if evaluate_logic_block(data, rule["conditions"], matcher, graph, node):
+        if predicate(data, node):
             matched_users.add(node)
 
     return matched_users
+
+
+def apply_logical_rules(graph, rules, matcher=None, index=None, profiles=None, statistics=None):
+    """
+    Evaluates many rules together: returns {rule name: set of user nodes},
+    or {rule name: Audience} when a GraphIndex is given.
+
+    rules is a list of rules named by their "name" key, or a {name: rule}
+    dict. The rules are compiled into one batch (see
+    rule_compiler.compile_rules): equal sub-conditions are evaluated once,
+    and without an index all rules are checked in a single pass over the
+    users, each user's interests being collected only once. statistics
+    reorders clauses as in apply_logical_rule.
+    """
+    batch = compile_rules(rules, matcher, graph, profiles)
+    if statistics is not None:
+        batch = plan_rules(batch, statistics)
+    if index is not None:
+        return batch.select(index)
+    return batch.select_users()
+
+
+def explain_rule(graph, rule, matcher=None, statistics=None):
+    """
+    The evaluation plan apply_logical_rule would use for rule, as text: one
+    clause per line in the order it runs, with estimated cost and
+    selectivity when statistics are given.
+    """
+    compiled = compile_rule(rule["conditions"], matcher, graph)
+    if statistics is not None:
+        compiled = plan_rule(compiled, statistics)
+    return explain_plan(compiled)
@@ -0,0 +1,266 @@
+# src/graph_store.py
+
+import hashlib
+import os
+
+import numpy as np
+
+try:
+    from .array_store import load_array, load_meta, save_arrays
+    from .graph_builder import build_knowledge_graph_from_config
+    from .graph_index import CategoricalColumn, GraphIndex, IntColumn, UserTable, build_graph_index, encode_values
+    from .relation_graph import RelationDiGraph
+except ImportError:
+    from array_store import load_array, load_meta, save_arrays
+    from graph_builder import build_knowledge_graph_from_config
+    from graph_index import CategoricalColumn, GraphIndex, IntColumn, UserTable, build_graph_index, encode_values
+    from relation_graph import RelationDiGraph
+
+SNAPSHOT_VERSION = 1
+
+# Per-node state of an attribute column: key missing, key set to None, key set to a value.
+ABSENT, NONE, VALUE = 0, 1, 2
+
+# Stands in for "node has no such key" in per-node attribute value lists.
+MISSING = object()
+
+# Node id kinds in the id string table.
+STR_ID, INT_ID, FLOAT_ID = 0, 1, 2
+
+
+def snapshot_key(schema_path, data_paths, date_range=None):
+    """
+    Hash of graph_schema.json, the input files' fingerprints (path, size,
+    mtime) and the date window. Any change to the schema, a data file or the
+    window gives a new key.
+    """
+    h = hashlib.sha256(f"v{SNAPSHOT_VERSION}".encode())
+    if date_range is not None:
+        h.update(f"\0dates\0{date_range[0]}\0{date_range[1]}".encode())
+    with open(schema_path, 'rb') as f:
+        h.update(f.read())
+    for name in sorted(data_paths):
+        path = data_paths[name]
+        stat = os.stat(path)
+        h.update(f"\0{name}\0{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+    return h.hexdigest()[:16]
+
+
+def load_or_build_graph(schema_path, data_paths, snapshot_dir=".graph_cache", chunksize=None, date_range=None,
+                        workers=None):
+    """
+    Returns (graph, index) for the given schema and data files, loading them
+    from a snapshot in snapshot_dir when one exists for the same inputs, and
+    building + saving one otherwise (streaming the sources when chunksize is
+    set, in a process pool when workers is set, keeping only rows inside
+    date_range when it is).
+    """
+    path = os.path.join(snapshot_dir, snapshot_key(schema_path, data_paths, date_range))
+    if os.path.exists(os.path.join(path, "meta.json")):
+        G, index = load_snapshot(path)
+        print("✅ Graph loaded from snapshot:", path)
+        print("Number of nodes:", G.number_of_nodes())
+        print("Number of edges:", G.number_of_edges())
+        return G, index
+
+    G = build_knowledge_graph_from_config(
+        schema_path, data_paths, chunksize=chunksize, date_range=date_range, workers=workers
+    )
+    index = build_graph_index(G, schema_path)
+    save_snapshot(path, G, index)
+    return G, index
+
+
+def save_snapshot(path, graph, index):
+    """
+    Writes graph + index to the directory `path` as .npy arrays plus a
+    meta.json: node ids as a string table, node attributes as columns,
+    out-adjacency in CSR form with relation codes, and the index arrays.
+    """
+    nodes = list(graph.nodes)
+    position = {node: i for i, node in enumerate(nodes)}
+    arrays = {}
+    meta = {"version": SNAPSHOT_VERSION, "num_nodes": len(nodes)}
+
+    arrays["node_ids"], arrays["node_kinds"] = encode_ids(nodes)
+
+    # Node attributes, one column per key, in first-seen key order.
+    node_data = [data for _, data in graph.nodes(data=True)]
+    attr_keys = list(dict.fromkeys(key for data in node_data for key in data))
+    meta["node_attributes"] = []
+    for i, key in enumerate(attr_keys):
+        spec, column_arrays = encode_attribute([data.get(key, MISSING) for data in node_data], key)
+        meta["node_attributes"].append(spec)
+        arrays.update({f"attr{i}_{name}": arr for name, arr in column_arrays.items()})
+
+    # Out-adjacency as CSR, keeping each node's successor order.
+    succ = graph.succ
+    degrees = np.fromiter((len(succ[node]) for node in nodes), dtype=np.int64, count=len(nodes))
+    arrays["indptr"] = np.concatenate([[0], np.cumsum(degrees)])
+    arrays["indices"] = np.fromiter(
+        (position[target] for node in nodes for target in succ[node]),
+        dtype=np.int64, count=int(arrays["indptr"][-1]),
+    )
+    relations = {}
+    codes = []
+    for node in nodes:
+        for target, edge_data in succ[node].items():
+            if set(edge_data) != {"relation"}:
+                raise ValueError(f"Snapshots only store the 'relation' edge attribute, got {edge_data!r} on ({node!r}, {target!r})")
+            codes.append(relations.setdefault(edge_data["relation"], len(relations)))
+    if len(relations) > 255:
+        raise ValueError("Snapshots support at most 255 distinct edge relations.")
+    arrays["edge_relations"] = np.array(codes, dtype=np.uint8)
+    meta["relations"] = list(relations)
+
+    # Index: users by node position, interest → user positions as CSR, user table columns.
+    arrays["index_users"] = np.array([position[user] for user in index.users], dtype=np.int64)
+    interests = list(index.users_by_interest)
+    meta["interests"] = interests
+    interest_sizes = [len(index.users_by_interest[i]) for i in interests]
+    arrays["interest_indptr"] = np.concatenate([[0], np.cumsum(interest_sizes, dtype=np.int64)])
+    arrays["interest_users"] = (
+        np.concatenate([index.users_by_interest[i] for i in interests]).astype(np.int64)
+        if interests else np.zeros(0, dtype=np.int64)
+    )
+    meta["activity_relations"] = sorted(index.activity_relations)
+    meta["interest_relations"] = sorted(index.interest_relations)
+    meta["user_columns"] = {}
+    for field, column in index.user_table.columns.items():
+        if isinstance(column, IntColumn):
+            meta["user_columns"][field] = {"kind": "int"}
+            arrays[f"user_{field}_values"] = column.values
+            arrays[f"user_{field}_present"] = column.present
+        else:
+            meta["user_columns"][field] = {"kind": "categorical", "categories": column.categories}
+            arrays[f"user_{field}_codes"] = column.codes
+
+    save_arrays(path, arrays, meta, prefix=".tmp_snapshot_")
+
+
+def load_snapshot(path):
+    """
+    Loads (graph, index) saved by save_snapshot. Arrays are memory-mapped;
+    the index keeps using them directly, the networkx graph is rebuilt
+    from them.
+    """
+    meta = load_meta(path)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {meta.get('version')} in {path}")
+
+    def load(name):
+        return load_array(path, name)
+
+    ids = decode_ids(load("node_ids"), load("node_kinds"))
+
+    columns = [
+        (spec["key"], decode_attribute(spec, {name: load(f"attr{i}_{name}") for name in spec["arrays"]}))
+        for i, spec in enumerate(meta["node_attributes"])
+    ]
+    G = RelationDiGraph()
+    G.add_nodes_from(
+        (node_id, {key: values[j] for key, values in columns if values[j] is not MISSING})
+        for j, node_id in enumerate(ids)
+    )
+
+    indptr = load("indptr")
+    sources = np.repeat(np.arange(len(ids)), np.diff(indptr)).tolist()
+    relations = meta["relations"]
+    G.add_edges_from(
+        (ids[s], ids[t], {"relation": relations[code]})
+        for s, t, code in zip(sources, load("indices").tolist(), load("edge_relations").tolist())
+    )
+
+    interest_indptr = load("interest_indptr")
+    interest_users = load("interest_users")
+    users_by_interest = {
+        interest: interest_users[interest_indptr[k]:interest_indptr[k + 1]]
+        for k, interest in enumerate(meta["interests"])
+    }
+    user_columns = {}
+    for field, spec in meta["user_columns"].items():
+        if spec["kind"] == "int":
+            user_columns[field] = IntColumn(load(f"user_{field}_values"), load(f"user_{field}_present"))
+        else:
+            user_columns[field] = CategoricalColumn(load(f"user_{field}_codes"), spec["categories"])
+
+    index = GraphIndex(
+        tuple(ids[i] for i in load("index_users").tolist()),
+        users_by_interest,
+        UserTable(user_columns),
+        frozenset(meta["activity_relations"]),
+        frozenset(meta["interest_relations"]),
+    )
+    return G, index
+
+
+def encode_ids(nodes):
+    """
+    Node ids as one NUL-separated UTF-8 byte array plus a kind per id, so
+    int/float ids (numeric CSV columns) survive the round trip.
+    """
+    kinds = []
+    parts = []
+    for node in nodes:
+        if isinstance(node, str):
+            if "\0" in node:
+                raise ValueError(f"Node id {node!r} contains a NUL character.")
+            kinds.append(STR_ID)
+            parts.append(node)
+        elif isinstance(node, (int, np.integer)) and not isinstance(node, bool):
+            kinds.append(INT_ID)
+            parts.append(str(int(node)))
+        elif isinstance(node, (float, np.floating)):
+            kinds.append(FLOAT_ID)
+            parts.append(repr(float(node)))
+        else:
+            raise ValueError(f"Unsupported node id type {type(node).__name__}: {node!r}")
+    data = np.frombuffer("\0".join(parts).encode("utf-8"), dtype=np.uint8)
+    return data, np.array(kinds, dtype=np.uint8)
+
+
+def decode_ids(data, kinds):
+    if len(kinds) == 0:
+        return []
+    ids = bytes(data).decode("utf-8").split("\0")
+    for j in np.flatnonzero(kinds != STR_ID).tolist():
+        ids[j] = int(ids[j]) if kinds[j] == INT_ID else float(ids[j])
+    return ids
+
+
+def attribute_state(values):
+    """Per-node ABSENT / NONE / VALUE state of an attribute's values (MISSING where a node lacks the key)."""
+    return np.array([ABSENT if v is MISSING else NONE if v is None else VALUE for v in values], dtype=np.uint8)
+
+
+def encode_attribute(values, key):
+    """
+    One node attribute column: a state per node (ABSENT / NONE / VALUE) plus
+    int64 values or categorical codes for the nodes that have a value.
+    """
+    state = attribute_state(values)
+    encoded, categories = encode_values(values, (state == VALUE).tolist())
+
+    if categories is None:
+        return {"key": key, "kind": "int", "arrays": ["state", "values"]}, {"state": state, "values": encoded}
+
+    if all(isinstance(v, str) for v in categories):
+        return (
+            {"key": key, "kind": "str", "categories": categories, "arrays": ["state", "codes"]},
+            {"state": state, "codes": encoded},
+        )
+
+    raise ValueError(f"Snapshots only store int or str node attributes; '{key}' has other values.")
+
+
+def decode_attribute(spec, arrays):
+    """Per-node values of one attribute column, with MISSING for nodes without the key."""
+    state = np.asarray(arrays["state"])
+    if spec["kind"] == "int":
+        values = np.asarray(arrays["values"]).astype(object)
+    else:
+        categories = np.array(spec["categories"] + [None], dtype=object)
+        values = categories[np.asarray(arrays["codes"])]
+    values[state == NONE] = None
+    values[state == ABSENT] = MISSING
+    return values.tolist()
@@ -0,0 +1,140 @@
+# src/interest_profiles.py
+
+import sys
+import threading
+from collections import OrderedDict
+
+try:
+    from .relation_graph import ACTIVITY_RELATIONS, INTEREST_RELATIONS, activity_items, item_interests, relation_successors_of
+except ImportError:
+    from relation_graph import ACTIVITY_RELATIONS, INTEREST_RELATIONS, activity_items, item_interests, relation_successors_of
+
+# Rough bytes per cached entry on top of its tuple: the OrderedDict slot,
+# its linked-list node and the key reference.
+ENTRY_BYTES = 120
+
+
+class InterestProfiles:
+    """
+    Per-user interest profiles for tag/genre checks: the lowercased interests
+    a user reaches through an activity edge (purchased/watched) followed by
+    an interest edge (tagged_as/about).
+
+    A profile is computed on first access by walking the user's two-hop
+    neighborhood, then reused by every later tag/genre condition on that
+    user, within a rule and across rules. The lowercased interests of each
+    item visited are cached too, so the walk after the first user through an
+    item is a set union. Once the estimated size of all entries passes
+    max_bytes, the least recently used entries are evicted (see evict()).
+
+    After incremental updates, pass the new edges to update() so the
+    affected users are recomputed (graph_builder.apply_delta does this when
+    given profiles=).
+    """
+
+    def __init__(self, graph, max_bytes=64 * 2**20):
+        self.graph = graph
+        self.max_bytes = max_bytes
+        self.profiles = OrderedDict()
+        self.item_interests = OrderedDict()
+        self.nbytes = 0
+        self.item_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, user_node):
+        """The lowercased interests user_node reaches, as a tuple without duplicates."""
+        with self.lock:
+            profile = self.profiles.get(user_node)
+            if profile is not None:
+                self.hits += 1
+                self.profiles.move_to_end(user_node)
+                return profile
+
+            self.misses += 1
+            profile = self.walk(user_node)
+            self.profiles[user_node] = profile
+            self.nbytes += entry_bytes(profile)
+            self.evict()
+            return profile
+
+    def walk(self, user_node):
+        successors = relation_successors_of(self.graph)
+        found = set()
+        for item in activity_items(successors, user_node):
+            interests = self.item_interests.get(item)
+            if interests is None:
+                # Lowercased once per item, then shared by every user reaching it.
+                interests = tuple({interest.lower() for interest in item_interests(successors, item)})
+                self.item_interests[item] = interests
+                self.item_bytes += entry_bytes(interests)
+                self.nbytes += entry_bytes(interests)
+            else:
+                self.item_interests.move_to_end(item)
+            found.update(interests)
+        # A tuple takes a fraction of a small frozenset's memory, and
+        # tag/genre checks only need terms.isdisjoint(profile).
+        return tuple(found)
+
+    def evict(self):
+        """
+        Drops entries until under max_bytes: least recently used profiles, or
+        least recently used item entries while those take more than half the
+        budget.
+        """
+        while self.nbytes > self.max_bytes and (self.profiles or self.item_interests):
+            if self.item_interests and (self.item_bytes > self.max_bytes // 2 or not self.profiles):
+                _, evicted = self.item_interests.popitem(last=False)
+                self.item_bytes -= entry_bytes(evicted)
+            else:
+                _, evicted = self.profiles.popitem(last=False)
+            self.nbytes -= entry_bytes(evicted)
+            self.evictions += 1
+
+    def invalidate(self, users):
+        """Drops the cached profiles of the given users."""
+        with self.lock:
+            for user in users:
+                profile = self.profiles.pop(user, None)
+                if profile is not None:
+                    self.nbytes -= entry_bytes(profile)
+
+    def update(self, new_edges):
+        """
+        Invalidates what new (source, target, relation) edges change: the
+        profile of the source of an activity edge, and for an interest edge,
+        the source item's interests and the profile of every user with an
+        activity edge to it.
+        """
+        if not self.profiles and not self.item_interests:
+            return
+        pred = self.graph.pred
+        touched = set()
+        with self.lock:
+            for source, target, relation in new_edges:
+                if relation in ACTIVITY_RELATIONS:
+                    touched.add(source)
+                elif relation in INTEREST_RELATIONS and source in pred:
+                    interests = self.item_interests.pop(source, None)
+                    if interests is not None:
+                        self.item_bytes -= entry_bytes(interests)
+                        self.nbytes -= entry_bytes(interests)
+                    touched.update(
+                        user for user, edge_data in pred[source].items()
+                        if edge_data.get("relation") in ACTIVITY_RELATIONS
+                    )
+        self.invalidate(touched)
+
+    def clear(self):
+        with self.lock:
+            self.profiles.clear()
+            self.item_interests.clear()
+            self.nbytes = 0
+            self.item_bytes = 0
+
+    def __len__(self):
+        return len(self.profiles)
+
+
+def entry_bytes(profile):
+    return sys.getsizeof(profile) + ENTRY_BYTES
@@ -0,0 +1,202 @@
+# src/llm_client.py
+
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Chat completions endpoint (overridable, e.g. for a local stub).
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
+
+# Statuses worth another attempt: rate limiting and transient server errors.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class LLMMetrics:
+    """
+    Per-call latency and outcome counters of an LLMClient. A call's latency
+    covers all of its attempts, including backoff sleeps.
+    """
+
+    def __init__(self, window=1000):
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.latencies = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, latency, attempts, ok):
+        with self.lock:
+            self.calls += 1
+            self.retries += attempts - 1
+            if not ok:
+                self.failures += 1
+            self.latencies.append(latency)
+
+    def summary(self):
+        """Counters plus mean / p50 / p95 / max latency (seconds) over the last `window` calls."""
+        with self.lock:
+            latencies = sorted(self.latencies)
+            summary = {"calls": self.calls, "failures": self.failures, "retries": self.retries}
+        if latencies:
+            summary.update(
+                mean=sum(latencies) / len(latencies),
+                p50=latencies[len(latencies) // 2],
+                p95=latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                max=latencies[-1],
+            )
+        return summary
+
+
+class LLMClient:
+    """
+    Shared HTTP client for the OpenRouter chat completions API.
+
+    One requests.Session with a keep-alive connection pool of pool_size, so
+    calls after the first skip the TCP / TLS handshake. Every attempt is
+    bounded by (connect_timeout, read_timeout) seconds. Connection errors,
+    timeouts and 429 / 5xx responses are retried up to max_retries times
+    with exponential backoff (backoff, 2 * backoff, 4 * backoff ... seconds, jittered, capped
+    at max_backoff; a Retry-After header is honored up to the same cap).
+    Latencies and outcomes are recorded in `metrics`.
+    """
+
+    def __init__(self, url=None, api_key=None, connect_timeout=5.0, read_timeout=60.0, max_retries=3,
+                 backoff=0.5, max_backoff=8.0, pool_size=10):
+        self.url = url or OPENROUTER_URL
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.metrics = LLMMetrics()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def headers(self):
+        api_key = self.api_key or os.getenv("OPENROUTER_API_KEY")
+        return {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+
+    def post(self, payload, stream=False):
+        """
+        POSTs a chat completions payload and returns the final
+        requests.Response, which may still carry an error status once the
+        retries are used up. Connection errors and timeouts are re-raised
+        after the last attempt.
+        """
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = self.session.post(self.url, headers=self.headers(), json=payload,
+                                             timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt > self.max_retries:
+                    self.metrics.record(time.perf_counter() - start, attempt, ok=False)
+                    raise
+                time.sleep(self.retry_delay(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt <= self.max_retries:
+                delay = self.retry_delay(attempt, response.headers.get("Retry-After"))
+                response.close()
+                time.sleep(delay)
+                continue
+
+            self.metrics.record(time.perf_counter() - start, attempt, ok=response.ok)
+            return response
+
+    def retry_delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(self.max_backoff, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def chat_completion(self, **payload):
+        """
+        Chat completion as a parsed JSON dict (the shape openai.ChatCompletion
+        returned). Raises requests.HTTPError if the call still fails after
+        retries.
+        """
+        response = self.post(payload)
+        response.raise_for_status()
+        return response.json()
+
+    def stream_chat_completion(self, payload):
+        """
+        Streams a chat completion (server-sent events), yielding the content
+        deltas as they arrive. Closing the generator early (break out of the
+        loop, or .close()) closes the connection, which cancels the rest of
+        the generation. Raises requests.HTTPError if the call fails (with the
+        response, its body already read, attached), also for an error event
+        in the stream.
+        """
+        response = self.post(dict(payload, stream=True), stream=True)
+        try:
+            if not response.ok:
+                response.content  # read the error body before the connection closes
+                response.raise_for_status()
+            for data in iter_sse_data(response):
+                if data == "[DONE]":
+                    return
+                event = json.loads(data)
+                if "error" in event:
+                    raise requests.HTTPError(f"Stream error: {event['error']}")
+                choices = event.get("choices") or []
+                content = choices[0].get("delta", {}).get("content") if choices else None
+                if content:
+                    yield content
+        finally:
+            response.close()
+
+    def close(self):
+        self.session.close()
+
+
+def iter_sse_data(response):
+    """
+    The data fields of the server-sent events in a streamed response, as
+    each line arrives. Reads with read1 so a line is passed on as soon as it
+    is received, not once a fixed-size buffer fills up, and decodes gzip /
+    deflate content encodings on the way; comment lines (keep-alives) are
+    skipped.
+    """
+    buffer = b""
+    while True:
+        chunk = response.raw.read1(8192, decode_content=True)
+        if not chunk:
+            break
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line = line.decode("utf-8").rstrip("\r")
+            if line.startswith("data:"):
+                yield line[5:].strip()
+    line = buffer.decode("utf-8").rstrip("\r")
+    if line.startswith("data:"):
+        yield line[5:].strip()
+
+
+shared_client = None
+shared_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """The process-wide LLMClient shared by the prompt_to_rules extractors."""
+    global shared_client
+    with shared_client_lock:
+        if shared_client is None:
+            shared_client = LLMClient()
+        return shared_client
@@ -0,0 +1,179 @@
+# src/llm_json.py
+
+import json
+import re
+
+import json5
+
+# Outside strings: a whole string, taken as one token in the common case
+# where it ends in the same chunk - opened with a plain double quote, a smart
+# double quote (group 1 holds its contents) or a plain single quote - or a
+# single character the scanner has to look at. Everything between tokens is
+# copied as is.
+TOKEN = re.compile(
+    r'"[^"\\]*(?:\\.[^"\\]*)*"'
+    r'|[“”]([^"“”\\]*(?:\\.[^"“”\\]*)*)["“”]'
+    r"|'[^'\\]*(?:\\.[^'\\]*)*'"
+    r"""|[{}\[\]"'“”‘’,`\\]""",
+    re.DOTALL,
+)
+
+# Quote characters that can close a string, by the character that opened it.
+# Strings the LLM opened with a smart quote may close with a smart or plain one.
+STRING_CLOSERS = {
+    '"': '"',
+    "“": '"“”',
+    "”": '"“”',
+    "'": "'",
+    "‘": "'‘’",
+    "’": "'‘’",
+}
+
+# Inside strings: the characters that can end the string, or a backslash.
+STRING_ENDS = {closers: re.compile("[" + re.escape(closers) + r"\\]") for closers in set(STRING_CLOSERS.values())}
+
+# Finds the end of an object that is already strict JSON, at C speed.
+STRICT_DECODER = json.JSONDecoder()
+
+
+class JSONObjectScanner:
+    """
+    Single-pass, string-aware extraction of the first JSON object in LLM
+    output, fed as one string or as streamed chunks.
+
+    Text before the first "{" is skipped, and scanning stops where that
+    object closes, so prose and markdown fences around it are dropped.
+    Inside the object it
+      - writes smart double quotes that delimit strings as plain ones, and
+        keeps single-quoted strings single-quoted (JSON5);
+      - drops commas directly before "}" or "]" and stray backticks;
+      - leaves string contents untouched: braces, commas and quotes inside
+        a string do not count.
+
+    Each character is visited once, with whole strings and the runs between
+    special characters matched by regex and copied in bulk, so the cost is
+    linear in the input.
+    """
+
+    def __init__(self):
+        self.out = []
+        self.started = False
+        self.done = False
+        self.depth = 0
+        self.closers = None  # quote characters closing the current string, None outside strings
+        self.escaped = False
+        self.pending_comma = None  # position in out of a comma that may turn out to be trailing
+
+    def feed(self, text):
+        """Scans the next chunk; returns True once the outermost object has closed."""
+        if self.done:
+            return True
+        pos = 0
+        if not self.started:
+            pos = text.find("{")
+            if pos < 0:
+                return False
+            self.started = True
+
+        out = self.out
+        if self.escaped and pos < len(text):
+            out.append(text[pos])
+            pos += 1
+            self.escaped = False
+
+        while True:
+            if self.closers is not None:
+                # Inside a string left open by the previous token or chunk.
+                match = STRING_ENDS[self.closers].search(text, pos)
+                end = match.start() if match else len(text)
+                out.append(text[pos:end])
+                if match is None:
+                    return False
+                pos = end + 1
+                if match.group() == "\\":
+                    if pos < len(text):
+                        out.append(text[end:pos + 1])
+                        pos += 1
+                    else:
+                        out.append("\\")
+                        self.escaped = True
+                else:
+                    out.append('"' if '"' in self.closers else "'")
+                    self.closers = None
+                continue
+
+            match = TOKEN.search(text, pos)
+            end = match.start() if match else len(text)
+            if end > pos:
+                span = text[pos:end]
+                out.append(span)
+                if not span.isspace():
+                    self.pending_comma = None
+            if match is None:
+                return False
+
+            token = match.group()
+            pos = match.end()
+            if len(token) > 1:
+                # A complete string, written with plain quotes.
+                self.pending_comma = None
+                if match.group(1) is None:
+                    out.append(token)
+                else:
+                    out.append('"' + match.group(1) + '"')
+            elif token in "{[":
+                self.depth += 1
+                self.pending_comma = None
+                out.append(token)
+            elif token in "}]":
+                if self.pending_comma is not None:
+                    out[self.pending_comma] = ""
+                    self.pending_comma = None
+                self.depth -= 1
+                out.append(token)
+                if self.depth == 0:
+                    self.done = True
+                    return True
+            elif token == ",":
+                self.pending_comma = len(out)
+                out.append(token)
+            elif token in STRING_CLOSERS:
+                self.closers = STRING_CLOSERS[token]
+                self.pending_comma = None
+                out.append('"' if '"' in self.closers else "'")
+            elif token == "\\":
+                self.pending_comma = None
+                out.append(token)
+            # Backticks outside strings (stray fence characters) are dropped.
+
+    def text(self):
+        return "".join(self.out)
+
+
+def clean_json_response(raw_text):
+    """
+    The first JSON object in raw LLM output, cleaned up for parsing (see
+    JSONObjectScanner). Output without any "{" is returned stripped.
+
+    Objects that are already strict JSON are cut out with the C decoder's
+    raw_decode, which finds where they end without a Python-level scan.
+    """
+    start = raw_text.find("{")
+    if start < 0:
+        return raw_text.strip()
+    try:
+        end = STRICT_DECODER.raw_decode(raw_text, start)[1]
+        return raw_text[start:end]
+    except ValueError:
+        pass
+    scanner = JSONObjectScanner()
+    scanner.feed(raw_text[start:])
+    return scanner.text()
+
+
+def parse_json_response(cleaned):
+    """Strict json.loads first; json5 (single quotes, unquoted keys, ...) only if that fails."""
+    try:
+        return json.loads(cleaned)
+    except ValueError:
+        return json5.loads(cleaned)
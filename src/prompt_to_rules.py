@@ -1,43 +1,21 @@
-import openai
+import asyncio
 import json
-import json5
-import re
 import os
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
 #from .utils import clean_json_response
 
-# openai.api_key = os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENAI_API_KEY")
+try:
+    from .llm_client import get_llm_client
+    from .llm_json import JSONObjectScanner, clean_json_response, parse_json_response
+    from .rule_cache import rule_cache_key
+except ImportError:
+    from llm_client import get_llm_client
+    from llm_json import JSONObjectScanner, clean_json_response, parse_json_response
+    from rule_cache import rule_cache_key
 
-openai.api_key = os.getenv("OPENROUTER_API_KEY")
-openai.api_base = "https://openrouter.ai/api/v1"
-
-
-def clean_json_response(raw_text):
-    # Normalize smart quotes
-    raw_text = raw_text.replace("“", "\"").replace("”", "\"").replace("‘", "'").replace("’", "'")
-
-    # Remove markdown/code fences
-    raw_text = re.sub(r"```.*?\n|```", "", raw_text).strip()
-
-    # Remove trailing commas before closing braces/brackets
-    raw_text = re.sub(r",\s*([}\]])", r"\1", raw_text)
-
-    # Track outermost JSON object
-    open_braces = 0
-    close_index = None
-    for i, char in enumerate(raw_text):
-        if char == "{":
-            open_braces += 1
-        elif char == "}":
-            open_braces -= 1
-            if open_braces == 0:
-                close_index = i
-                break
-
-    if close_index is not None:
-        raw_text = raw_text[:close_index + 1]
-
-    return raw_text
+# All extractors call OpenRouter through the shared, pooled LLMClient
+# (llm_client.py), which reads OPENROUTER_API_KEY and OPENROUTER_URL.
 
 
 def extract_rules_from_prompt_llm(prompt):
@@ -50,7 +28,7 @@ Given a user query in natural language, return a JSON object with two keys:
 Return JSON only. No explanation or markdown.
 """
 
-    response = openai.ChatCompletion.create(
+    response = get_llm_client().chat_completion(
         model="mistralai/mixtral-8x7b-instruct",
         messages=[
             {"role": "system", "content": system_msg.strip()},
@@ -98,7 +76,7 @@ Example output for "users about to graduate":
 Return valid JSON only. Do not use markdown or explanations.
 """
 
-    response = openai.ChatCompletion.create(
+    response = get_llm_client().chat_completion(
         model="mistralai/mixtral-8x7b-instruct",
         messages=[
             {"role": "system", "content": system_msg.strip()},
@@ -111,7 +89,7 @@ Return valid JSON only. Do not use markdown or explanations.
     try:
         reply = response["choices"][0]["message"]["content"]
         cleaned = clean_json_response(reply)
-        return json.loads(cleaned)
+        return parse_json_response(cleaned)
     except Exception as e:
         print("❌ Failed to parse response:", e)
         print("Raw content:", reply)
@@ -159,7 +137,7 @@ Return only valid JSON - no markdown or explanations.
 
 """
 
-    response = openai.ChatCompletion.create(
+    response = get_llm_client().chat_completion(
         model="mistralai/mixtral-8x7b-instruct",
         messages=[
             {"role": "system", "content": system_msg.strip()},
@@ -172,7 +150,7 @@ Return only valid JSON - no markdown or explanations.
     try:
         reply = response["choices"][0]["message"]["content"]
         cleaned = clean_json_response(reply)
-        return json.loads(cleaned)
+        return parse_json_response(cleaned)
     except Exception as e:
         print("❌ Failed to parse response:", e)
         print("Raw content:", reply)
@@ -187,12 +165,6 @@ def extract_rules_from_prompt_llm3_multiplerules(prompt, verbose=False):
             "raw_response": None
         }
 
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-
     system_msg = """
 You are an intelligent assistant that creates audience filtering rules based on user data stored in a Knowledge Graph.
 
@@ -233,7 +205,7 @@ Return only valid JSON — no markdown, no explanation.
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = get_llm_client().post(payload)
         response.raise_for_status()
         response_data = response.json()
 
@@ -244,7 +216,7 @@ Return only valid JSON — no markdown, no explanation.
             print("🧠 Raw LLM Output:", raw)
             print("🧹 Cleaned JSON:", cleaned)
 
-        return json5.loads(cleaned)
+        return parse_json_response(cleaned)
 
     except Exception as e:
         return {
@@ -252,21 +224,9 @@ Return only valid JSON — no markdown, no explanation.
             "raw_response": response.text if 'response' in locals() else "No response"
         }
 
-def extract_rules_from_prompt_llm3(prompt, verbose=False):
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        return {
-            "error": "Missing OPENROUTER_API_KEY in environment.",
-            "raw_response": None
-        }
-
-    url = "https://openrouter.ai/api/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-
-    system_msg = """
+# Model and system prompt of extract_rules_from_prompt_llm3; both are part of its cache key.
+RULE_MODEL = "mistralai/mixtral-8x7b-instruct"
+RULE_SYSTEM_PROMPT = """
 You are an intelligent assistant that generates a single, structured audience filtering rule using data from a Knowledge Graph.
 
 The graph includes users, products, and content nodes with the following fields:
@@ -312,31 +272,167 @@ Return **only** the JSON object. Do **not** use markdown code blocks. Do **not**
 Do NOT include markdown, explanations, or nested objects like "user", "product", etc. Just return the valid JSON object.
 """
 
+
+def extract_rules_from_prompt_llm3(prompt, verbose=False, cache=None, client=None, stream=False):
+    """
+    Asks the LLM for one rule ({"conditions": ...}) matching the prompt.
+    Failures return {"error": ..., "raw_response": ...}.
+
+    stream: request a streamed completion and parse it as it arrives; the
+    call returns as soon as the outermost JSON object closes, and the rest
+    of the generation (usually an explanation) is cancelled.
+
+    cache: optional rule_cache.RuleCache. A prompt asked before (same
+    normalized text, model and system prompt) is answered from it without
+    an API call; successful results are added to it.
+    client: LLMClient to call through (default: the shared get_llm_client()).
+    """
+    key = rule_cache_key(prompt, RULE_MODEL, RULE_SYSTEM_PROMPT) if cache is not None else None
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        return {
+            "error": "Missing OPENROUTER_API_KEY in environment.",
+            "raw_response": None
+        }
+
     payload = {
-        "model": "mistralai/mixtral-8x7b-instruct",
+        "model": RULE_MODEL,
         "messages": [
-            {"role": "system", "content": system_msg},
+            {"role": "system", "content": RULE_SYSTEM_PROMPT},
             {"role": "user", "content": prompt.strip()}
         ],
         "temperature": 0.3
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        response_data = response.json()
+        if stream:
+            raw, cleaned = stream_rule_json(client or get_llm_client(), payload)
+        else:
+            response = (client or get_llm_client()).post(payload)
+            response.raise_for_status()
+            response_data = response.json()
 
-        raw = response_data["choices"][0]["message"]["content"]
-        cleaned = clean_json_response(raw)
+            raw = response_data["choices"][0]["message"]["content"]
+            cleaned = clean_json_response(raw)
 
         if verbose:
             print("🧠 Raw LLM Output:", raw)
             print("🧹 Cleaned JSON:", cleaned)
 
-        return json5.loads(cleaned)
+        rule = parse_json_response(cleaned)
+        if cache is not None and isinstance(rule, dict) and "error" not in rule:
+            cache.put(key, rule)
+        return rule
 
+    except StreamedRuleError as e:
+        return {"error": str(e), "raw_response": e.raw}
     except Exception as e:
+        if stream:
+            return {"error": str(e), "raw_response": raw if 'raw' in locals() else "No response"}
         return {
             "error": str(e),
             "raw_response": response.text if 'response' in locals() else "No response"
         }
+
+
+class StreamedRuleError(Exception):
+    """A streamed completion failed; raw is the text received before that."""
+
+    def __init__(self, message, raw):
+        super().__init__(message)
+        self.raw = raw
+
+
+def stream_rule_json(client, payload):
+    """
+    Streams a completion into a JSONObjectScanner and stops reading (closing
+    the connection) once the outermost object closes. Returns the raw text
+    received and the cleaned object text.
+    """
+    scanner = JSONObjectScanner()
+    received = []
+    chunks = client.stream_chat_completion(payload)
+    try:
+        for content in chunks:
+            received.append(content)
+            if scanner.feed(content):
+                break
+    except Exception as e:
+        # An error status carries its response body, like the non-streaming path.
+        response = getattr(e, "response", None)
+        raw = response.text if response is not None else "".join(received) or "No response"
+        raise StreamedRuleError(str(e), raw) from e
+    finally:
+        chunks.close()
+
+    raw = "".join(received)
+    return raw, scanner.text() if scanner.started else raw.strip()
+
+
+async def extract_rules_batch(prompts, concurrency=8, requests_per_minute=None, cache=None, client=None):
+    """
+    Runs extract_rules_from_prompt_llm3 over many prompts with up to
+    `concurrency` requests in flight, yielding (position, result) pairs in
+    completion order; position is the prompt's index in `prompts`. A result
+    is the rule dict, or {"error": ..., "raw_response": ...} like the single
+    call returns.
+
+    Rate limits: requests_per_minute spaces out request starts across the
+    batch, and each request retries 429s with backoff (see LLMClient).
+    Prompts found in `cache` are yielded first without a request.
+    For concurrency above the client's pool_size (10 for the shared
+    client), pass a client=LLMClient(pool_size=concurrency).
+
+        async for position, result in extract_rules_batch(briefs, concurrency=16):
+            ...
+    """
+    prompts = list(prompts)
+    client = client or get_llm_client()
+    pending = []
+    for position, prompt in enumerate(prompts):
+        cached = cache.get(rule_cache_key(prompt, RULE_MODEL, RULE_SYSTEM_PROMPT)) if cache is not None else None
+        if cached is not None:
+            yield position, cached
+        else:
+            pending.append(position)
+    if not pending:
+        return
+
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+    next_start = [time.monotonic()]
+    pacing = asyncio.Lock()
+
+    async def extract(position, executor):
+        async with slots:
+            if interval:
+                async with pacing:
+                    delay = next_start[0] - time.monotonic()
+                    next_start[0] = max(next_start[0], time.monotonic()) + interval
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                result = await loop.run_in_executor(
+                    executor, extract_rules_from_prompt_llm3, prompts[position], False, cache, client
+                )
+            except Exception as e:
+                result = {"error": str(e), "raw_response": "No response"}
+        return position, result
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    tasks = [asyncio.ensure_future(extract(position, executor)) for position in pending]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # When the caller stops early, drop the queued prompts without
+        # waiting for the requests already in flight.
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,182 @@
+# src/relation_graph.py
+
+import networkx as nx
+
+# Edge relations walked from a user to an item, and from an item to an interest.
+ACTIVITY_RELATIONS = ("purchased", "watched")
+INTEREST_RELATIONS = ("tagged_as", "about")
+
+
+class RelationDiGraph(nx.DiGraph):
+    """
+    A networkx.DiGraph that also keeps one out-adjacency per edge relation,
+    so traversals can read only the edges of the relations they follow:
+
+        for item in G.relation_successors(user, "purchased"): ...
+        for product, tag in G.relation_edges("tagged_as"): ...
+
+    The partition is kept up to date by add_edge / add_edges_from and the
+    remove_* / clear methods. Changing an edge's "relation" in place
+    (G[u][v]["relation"] = ...) bypasses it; re-add the edge instead.
+    RelationDiGraph(G) converts any DiGraph.
+
+    Views (subgraph, edge_subgraph, reverse(copy=False) ...) are built as
+    instances of this class too, but without the partition; on them the
+    relation lookups filter edge data instead.
+    """
+
+    def __init__(self, incoming_graph_data=None, **attr):
+        self.relation_succ = {}
+        super().__init__(incoming_graph_data, **attr)
+
+    def is_view(self):
+        return hasattr(self, "_graph")
+
+    def relation_successors(self, node, relation):
+        """Successors of node along edges with the given relation (empty if none)."""
+        if self.is_view():
+            return filtered_successors(self, node, relation)
+        return self.relation_succ.get(relation, {}).get(node, ())
+
+    def relation_edges(self, relation):
+        """(u, v) pairs of every edge with the given relation."""
+        if self.is_view():
+            yield from filtered_edges(self, relation)
+            return
+        for u, targets in self.relation_succ.get(relation, {}).items():
+            for v in targets:
+                yield u, v
+
+    def move_edge(self, u, v, old, new):
+        if old == new and old is not None:
+            return
+        if old is not None:
+            targets = self.relation_succ[old][u]
+            del targets[v]
+            if not targets:
+                del self.relation_succ[old][u]
+        if new is not None:
+            self.relation_succ.setdefault(new, {}).setdefault(u, {})[v] = None
+
+    def edge_relation(self, u, v):
+        edge_data = self._succ.get(u, {}).get(v)
+        return None if edge_data is None else edge_data.get("relation")
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        old = self.edge_relation(u_of_edge, v_of_edge)
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+        self.move_edge(u_of_edge, v_of_edge, old, self._succ[u_of_edge][v_of_edge].get("relation"))
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        # Record each edge's relation before the base class adds it, and
+        # file the edge under its new relation once it has been added.
+        succ = self._succ
+        no_edges = {}
+
+        def tracked(ebunch):
+            for e in ebunch:
+                u, v = e[0], e[1]
+                old = succ.get(u, no_edges).get(v)
+                old = None if old is None else old.get("relation")
+                yield e
+                new = succ[u][v].get("relation")
+                if new != old:
+                    self.move_edge(u, v, old, new)
+
+        super().add_edges_from(tracked(ebunch_to_add), **attr)
+
+    def remove_edge(self, u, v):
+        old = self.edge_relation(u, v)
+        super().remove_edge(u, v)
+        self.move_edge(u, v, old, None)
+
+    def remove_edges_from(self, ebunch):
+        for e in ebunch:
+            u, v = e[0], e[1]
+            if self.has_edge(u, v):
+                self.remove_edge(u, v)
+
+    def remove_node(self, n):
+        if n in self._succ:
+            for v in list(self._succ[n]):
+                self.move_edge(n, v, self.edge_relation(n, v), None)
+            for u in list(self._pred[n]):
+                if u != n:
+                    self.move_edge(u, n, self.edge_relation(u, n), None)
+        super().remove_node(n)
+
+    def remove_nodes_from(self, nodes):
+        for n in list(nodes):
+            if n in self._succ:
+                self.remove_node(n)
+
+    def clear(self):
+        super().clear()
+        self.relation_succ = {}
+
+    def clear_edges(self):
+        super().clear_edges()
+        self.relation_succ = {}
+
+
+def filtered_successors(graph, node, relation):
+    """Successors of node along edges with the given relation, by edge data."""
+    adj = graph.adj
+    if node not in adj:
+        return ()
+    return [v for v, data in adj[node].items() if data.get("relation") == relation]
+
+
+def filtered_edges(graph, relation):
+    """(u, v) pairs of every edge with the given relation, by edge data."""
+    for u, v, edge_relation in graph.edges(data="relation"):
+        if edge_relation == relation:
+            yield u, v
+
+
+def relation_successors_of(graph):
+    """
+    graph.relation_successors, or for a graph without a per-relation
+    adjacency (a plain DiGraph from the reference builder in
+    bench_graph_build, an old pickle or a notebook; a networkx view of a
+    RelationDiGraph) an equivalent that filters each node's edges by relation.
+    """
+    if hasattr(graph, "relation_successors") and not is_graph_view(graph):
+        return graph.relation_successors
+    return lambda node, relation: filtered_successors(graph, node, relation)
+
+
+def relation_edges_of(graph):
+    """graph.relation_edges, or a scan of all edges' data (see relation_successors_of)."""
+    if hasattr(graph, "relation_edges") and not is_graph_view(graph):
+        return graph.relation_edges
+    return lambda relation: filtered_edges(graph, relation)
+
+
+def activity_items(successors, user_node, activity_relations=ACTIVITY_RELATIONS):
+    """Items user_node reaches through an activity edge (first hop of the interest walk)."""
+    for activity in activity_relations:
+        yield from successors(user_node, activity)
+
+
+def item_interests(successors, item, interest_relations=INTEREST_RELATIONS):
+    """Interest nodes item reaches through an interest edge (second hop)."""
+    for relation in interest_relations:
+        yield from successors(item, relation)
+
+
+def interest_walk(successors, user_node, activity_relations=ACTIVITY_RELATIONS, interest_relations=INTEREST_RELATIONS):
+    """
+    The user → item → interest walk behind tag/genre checks: yields
+    (item, interest) for every interest node user_node reaches through an
+    activity edge followed by an interest edge. successors is
+    relation_successors_of(graph). Callers that cache per item walk the two
+    hops separately with activity_items() and item_interests().
+    """
+    for item in activity_items(successors, user_node, activity_relations):
+        for interest in item_interests(successors, item, interest_relations):
+            yield item, interest
+
+
+def is_graph_view(graph):
+    return isinstance(graph, RelationDiGraph) and graph.is_view()
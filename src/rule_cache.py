@@ -0,0 +1,95 @@
+# src/rule_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    from .embedding_cache import LRUCache
+except ImportError:
+    from embedding_cache import LRUCache
+
+
+def normalize_prompt(prompt):
+    """Cache key form of a prompt: case-folded, whitespace collapsed."""
+    return " ".join(str(prompt).casefold().split())
+
+
+def rule_cache_key(prompt, model, system_prompt):
+    """Key of an LLM rule: normalized prompt, model name and a hash of the system prompt."""
+    system_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    return hashlib.sha256(json.dumps([normalize_prompt(prompt), model, system_hash]).encode("utf-8")).hexdigest()
+
+
+class RuleCache:
+    """
+    Parsed prompt-to-rule results, so asking the same prompt again skips the
+    LLM call.
+
+    Two tiers: an in-memory LRU of maxsize entries in front of a SQLite
+    table at `path` (pass path=None for memory only) shared across processes
+    and restarts. Entries older than ttl seconds are ignored and dropped
+    (ttl=None keeps them forever); the TTL is checked on read, so changing it
+    also applies to entries already stored.
+
+    Values are stored as JSON text and parsed on every get(), so callers
+    can modify what they get back.
+    """
+
+    def __init__(self, path=".rule_cache/rules.sqlite", maxsize=256, ttl=24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self.memory = LRUCache(maxsize)
+        self.lock = threading.Lock()
+        self.db = None
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS rules (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)")
+
+    def expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key):
+        """The cached result for key, or None."""
+        entry = self.memory.get(key)
+        if entry is not None:
+            created, text = entry
+            if not self.expired(created):
+                return json.loads(text)
+
+        if self.db is None:
+            return None
+        with self.lock:
+            row = self.db.execute("SELECT value, created FROM rules WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            text, created = row
+            if self.expired(created):
+                self.db.execute("DELETE FROM rules WHERE key = ?", (key,))
+                return None
+        self.memory.put(key, (created, text))
+        return json.loads(text)
+
+    def put(self, key, value):
+        text = json.dumps(value)
+        created = time.time()
+        self.memory.put(key, (created, text))
+        if self.db is not None:
+            with self.lock:
+                self.db.execute("INSERT OR REPLACE INTO rules (key, value, created) VALUES (?, ?, ?)", (key, text, created))
+
+    def clear(self):
+        self.memory = LRUCache(self.memory.maxsize)
+        if self.db is not None:
+            with self.lock:
+                self.db.execute("DELETE FROM rules")
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,506 @@
+# src/rule_compiler.py
+
+import json
+import operator
+
+import numpy as np
+
+try:
+    from .audience import Audience
+    from .interest_profiles import InterestProfiles
+    from .relation_graph import interest_walk, relation_successors_of
+except ImportError:
+    from audience import Audience
+    from interest_profiles import InterestProfiles
+    from relation_graph import interest_walk, relation_successors_of
+
+# Fields the LLM prompts allow in a rule. User fields are read from the user
+# node's attributes; interest fields are resolved through the graph.
+USER_FIELDS = ("age", "gender", "location", "education_level")
+INTEREST_FIELDS = ("tag", "genre")
+
+COMPARISONS = {
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "=": operator.eq,
+    "==": operator.eq,
+}
+
+
+class RuleError(ValueError):
+    """Raised when a rule's conditions cannot be compiled."""
+
+
+class CompiledRule:
+    """
+    A rule's conditions turned into a plan of LogicBlock / FieldCondition /
+    InterestCondition nodes.
+
+    Build it once with compile_rule(); the condition tree, operators, constant
+    values and semantic expansions of tag/genre terms are resolved up front.
+    The plan can run either per user (predicate) or as vectorized masks over
+    a GraphIndex (select). estimates holds the planner's (cost, selectivity)
+    per plan node when the plan came from rule_planner.plan_rule.
+    """
+
+    def __init__(self, conditions, plan, estimates=None):
+        self.conditions = conditions
+        self.plan = plan
+        self.estimates = estimates
+        self.predicate = plan.predicate
+
+    def __call__(self, user_data, user_node):
+        return self.predicate(user_data, user_node)
+
+    def select(self, index):
+        """Returns the Audience matching the rule, evaluated on the index's masks."""
+        return Audience.from_mask(index, self.plan.select(np.ones(len(index.users), dtype=bool), index))
+
+
+class LogicBlock:
+    """
+    An "and" / "or" over child plan nodes. positions, for a block reordered
+    by rule_planner, gives each child's position in the rule as written.
+    """
+
+    def __init__(self, op, children, positions=None):
+        self.op = op
+        self.children = children
+        self.positions = positions
+        preds = tuple(child.predicate for child in children)
+
+        if op == "and":
+            def predicate(user_data, user_node):
+                for pred in preds:
+                    if not pred(user_data, user_node):
+                        return False
+                return True
+        else:
+            def predicate(user_data, user_node):
+                for pred in preds:
+                    if pred(user_data, user_node):
+                        return True
+                return False
+
+        self.predicate = predicate
+
+    def select(self, candidates, index):
+        if self.op == "and":
+            for child in self.children:
+                if not candidates.any():
+                    break
+                candidates = child.select(candidates, index)
+            return candidates
+
+        matched = np.zeros_like(candidates)
+        for child in self.children:
+            matched |= child.select(candidates, index)
+        return matched
+
+
+class FieldCondition:
+    """
+    A condition on a user attribute (age, gender, location, ...).
+
+    op/compare/value come from "operator"/"value" (op as written in the
+    rule); equals/in_values are the fallbacks checked when the comparison
+    fails (or when there is none).
+    """
+
+    def __init__(self, field, op, compare, value, has_equals, equals, has_in, in_values):
+        self.field = field
+        self.op = op
+        self.compare = compare
+        self.value = value
+        self.has_equals = has_equals
+        self.equals = equals
+        self.has_in = has_in
+        self.in_values = in_values
+        self.predicate = self.build_predicate()
+
+    def build_predicate(self):
+        field, compare, val = self.field, self.compare, self.value
+        has_equals, equals = self.has_equals, self.equals
+        has_in, in_values = self.has_in, self.in_values
+
+        if compare is not None:
+            # A failed comparison still falls through to "equals"/"in", which
+            # then see the int-cast attribute value — same as evaluate_condition.
+            def predicate(user_data, user_node):
+                value = user_data.get(field)
+                if value is None:
+                    return False
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    return False
+                if compare(value, val):
+                    return True
+                if has_equals:
+                    return value == equals
+                if has_in:
+                    return value in in_values
+                return False
+
+            return predicate
+
+        if has_equals:
+            return lambda user_data, user_node: (
+                (value := user_data.get(field)) is not None and value == equals
+            )
+
+        return lambda user_data, user_node: (
+            (value := user_data.get(field)) is not None and value in in_values
+        )
+
+    def select(self, candidates, index):
+        return candidates & index.user_table.mask(self)
+
+
+class InterestCondition:
+    """A tag/genre condition, matched through the user's purchased/watched items."""
+
+    def __init__(self, field, terms, predicate):
+        self.field = field
+        self.terms = terms
+        self.predicate = predicate
+
+    def select(self, candidates, index):
+        return candidates & index.interest_mask(self.terms)
+
+
+class RuleBatch:
+    """
+    Several rules compiled together by compile_rules(). Equal sub-conditions
+    are one shared plan node, and tag/genre terms of all rules are expanded
+    in one batch.
+
+    select() computes each distinct node's mask once over the whole index.
+    select_users() makes one pass over the graph's users, evaluating every
+    rule per user: their interests are collected once (on first use, or
+    from the batch's InterestProfiles) and every distinct condition is
+    evaluated at most once per user.
+    """
+
+    def __init__(self, names, plans, graph, profiles=None):
+        self.names = names
+        self.plans = plans
+        self.graph = graph
+        self.profiles = profiles
+
+    def select(self, index):
+        """Returns {rule name: Audience}, evaluated on the index's masks."""
+        everyone = np.ones(len(index.users), dtype=bool)
+        masks = {}
+
+        def mask_of(node):
+            mask = masks.get(node)
+            if mask is None:
+                if isinstance(node, LogicBlock):
+                    combine = np.logical_and if node.op == "and" else np.logical_or
+                    mask = everyone if node.op == "and" else ~everyone
+                    for child in node.children:
+                        mask = combine(mask, mask_of(child))
+                else:
+                    mask = node.select(everyone, index)
+                masks[node] = mask
+            return mask
+
+        return {name: Audience.from_mask(index, mask_of(plan)) for name, plan in zip(self.names, self.plans)}
+
+    def select_users(self):
+        """Returns {rule name: set of user nodes}, from one pass over the graph's users."""
+        slots, evaluators = {}, {}
+        rules = [batch_evaluator(plan, slots, evaluators) for plan in self.plans]
+        matched = [set() for _ in self.plans]
+        # Slot 0 holds the user's interests (collected on first use); the
+        # other slots hold each plan node's result for the current user.
+        walks = any(isinstance(node, InterestCondition) and node.terms for node in evaluators)
+        if not walks:
+            interests_of = frozenset()
+        elif self.profiles is not None:
+            interests_of = self.profiles.get
+        else:
+            # A pass-local InterestProfiles: each item's interests are
+            # lowercased once, and no per-user profiles are kept.
+            interests_of = InterestProfiles(self.graph).walk
+        fresh_memo = [interests_of] + [None] * len(slots)
+
+        for node, data in self.graph.nodes(data=True):
+            if data.get("type") != "user":
+                continue
+            memo = fresh_memo.copy()
+            for evaluate, users in zip(rules, matched):
+                if evaluate(data, node, memo):
+                    users.add(node)
+
+        return dict(zip(self.names, matched))
+
+
+def batch_evaluator(node, slots, evaluators):
+    """
+    Per-user evaluate(user_data, user_node, memo) for a plan node inside a
+    RuleBatch. Every distinct node caches its result for the current user in
+    its own memo slot; memo[0] is the user's interest set, or the function
+    that collects it until first use.
+    """
+    if node in evaluators:
+        return evaluators[node]
+
+    slot = slots.setdefault(node, len(slots) + 1)
+
+    if isinstance(node, InterestCondition):
+        terms = node.terms
+
+        def evaluate(user_data, user_node, memo):
+            result = memo[slot]
+            if result is None:
+                interests = memo[0]
+                if callable(interests):
+                    interests = memo[0] = interests(user_node)
+                result = memo[slot] = not terms.isdisjoint(interests)
+            return result
+
+    elif isinstance(node, LogicBlock):
+        children = tuple(batch_evaluator(child, slots, evaluators) for child in node.children)
+
+        if node.op == "and":
+            def evaluate(user_data, user_node, memo):
+                result = memo[slot]
+                if result is None:
+                    result = True
+                    for child in children:
+                        if not child(user_data, user_node, memo):
+                            result = False
+                            break
+                    memo[slot] = result
+                return result
+        else:
+            def evaluate(user_data, user_node, memo):
+                result = memo[slot]
+                if result is None:
+                    result = False
+                    for child in children:
+                        if child(user_data, user_node, memo):
+                            result = True
+                            break
+                    memo[slot] = result
+                return result
+
+    else:
+        predicate = node.predicate
+
+        def evaluate(user_data, user_node, memo):
+            result = memo[slot]
+            if result is None:
+                result = memo[slot] = predicate(user_data, user_node)
+            return result
+
+    evaluators[node] = evaluate
+    return evaluate
+
+
+def compile_rule(conditions, matcher=None, graph=None, profiles=None):
+    """
+    Compiles a rule's "conditions" tree into a CompiledRule.
+
+    Semantics follow evaluate_logic_block/evaluate_condition, except that
+    malformed rules (unknown fields or operators, non-numeric comparison
+    values, missing "in" lists) raise RuleError instead of silently
+    matching nobody.
+
+    With profiles (an interest_profiles.InterestProfiles over the same
+    graph), tag/genre conditions read the user's cached interest profile
+    instead of walking their items.
+    """
+    if not is_logic_block(conditions):
+        raise RuleError("Rule conditions must be an 'and' / 'or' block.")
+
+    # Without a matcher and a graph there is nothing to walk: interest fields
+    # are not user attributes, so tag/genre conditions never match.
+    expansions = expand_rule_terms(conditions, matcher) if matcher is not None and graph is not None else None
+    return CompiledRule(conditions, compile_logic_block(conditions, expansions, graph, profiles))
+
+
+def compile_rules(rules, matcher=None, graph=None, profiles=None):
+    """
+    Compiles named rules into one RuleBatch.
+
+    rules: {name: rule} or a list of rules, named by their "name" key (or
+    their position when they have none). Each rule is a dict with
+    "conditions", compiled with the same semantics as compile_rule; a
+    malformed rule raises RuleError naming it.
+    """
+    if isinstance(rules, dict):
+        named = list(rules.items())
+    else:
+        named = [(rule.get("name", i) if isinstance(rule, dict) else i, rule) for i, rule in enumerate(rules)]
+    names = [name for name, _ in named]
+    if len(set(names)) != len(names):
+        raise RuleError("Rule names in a batch must be unique.")
+
+    conditions = [rule.get("conditions") if isinstance(rule, dict) else None for _, rule in named]
+    expansions = None
+    if matcher is not None and graph is not None:
+        expansions = expand_rule_terms({"or": conditions}, matcher)
+
+    shared = {}
+    plans = []
+    for name, conds in zip(names, conditions):
+        if not is_logic_block(conds):
+            raise RuleError(f"Rule '{name}': conditions must be an 'and' / 'or' block.")
+        try:
+            plans.append(compile_logic_block(conds, expansions, graph, profiles, shared))
+        except RuleError as e:
+            raise RuleError(f"Rule '{name}': {e}") from None
+    return RuleBatch(names, plans, graph, profiles)
+
+
+def is_logic_block(cond):
+    return isinstance(cond, dict) and ("and" in cond or "or" in cond)
+
+
+def compile_logic_block(logic_block, expansions, graph, profiles=None, shared=None):
+    """
+    shared, when given, maps the canonical JSON of every condition compiled
+    so far to its plan node, so equal sub-conditions (within a rule or across
+    the rules of a batch) compile to the same node.
+    """
+    key = shared_key(logic_block, shared)
+    if key is not None and key in shared:
+        return shared[key]
+
+    op = "and" if "and" in logic_block else "or"
+    children = logic_block[op]
+    if not isinstance(children, list):
+        raise RuleError(f"'{op}' must hold a list of conditions, got: {children!r}")
+
+    node = LogicBlock(op, [
+        compile_logic_block(cond, expansions, graph, profiles, shared) if is_logic_block(cond)
+        else compile_condition(cond, expansions, graph, profiles, shared)
+        for cond in children
+    ])
+    if key is not None:
+        shared[key] = node
+    return node
+
+
+def shared_key(condition, shared):
+    """Key of a condition in the `shared` node table; None when not sharing or not serializable."""
+    if shared is None:
+        return None
+    try:
+        return json.dumps(condition, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+
+
+def compile_condition(condition, expansions, graph, profiles=None, shared=None):
+    if not isinstance(condition, dict):
+        raise RuleError(f"Condition must be an object, got: {condition!r}")
+
+    key = shared_key(condition, shared)
+    if key is not None and key in shared:
+        return shared[key]
+    node = compile_leaf_condition(condition, expansions, graph, profiles)
+    if key is not None:
+        shared[key] = node
+    return node
+
+
+def compile_leaf_condition(condition, expansions, graph, profiles=None):
+    field = condition.get("field")
+    if field is None:
+        raise RuleError(f"Condition is missing 'field': {condition!r}")
+    if field not in USER_FIELDS and field not in INTEREST_FIELDS:
+        raise RuleError(f"Unknown field '{field}'. Expected one of: {', '.join(USER_FIELDS + INTEREST_FIELDS)}")
+
+    if field in INTEREST_FIELDS:
+        return compile_interest_condition(condition, expansions, graph, profiles)
+    return compile_field_condition(condition)
+
+
+def compile_interest_condition(condition, expansions, graph, profiles=None):
+    field = condition["field"]
+    values = condition.get("in")
+    if not isinstance(values, list):
+        raise RuleError(f"'{field}' condition needs an 'in' list, got: {condition!r}")
+    if not all(isinstance(val, str) for val in values):
+        raise RuleError(f"'{field}' terms must be strings, got: {values!r}")
+
+    if expansions is None:
+        return InterestCondition(field, frozenset(), lambda user_data, user_node: False)
+
+    expanded = frozenset().union(*(expansions[val.lower()] for val in values))
+    if profiles is not None:
+        profile = profiles.get
+        return InterestCondition(field, expanded, lambda user_data, user_node: not expanded.isdisjoint(profile(user_node)))
+
+    successors = relation_successors_of(graph)
+
+    def predicate(user_data, user_node):
+        return any(target_node.lower() in expanded for _, target_node in interest_walk(successors, user_node))
+
+    return InterestCondition(field, expanded, predicate)
+
+
+def collect_interest_terms(cond, terms):
+    """Adds the lowercased tag/genre terms found anywhere in cond to `terms`."""
+    if isinstance(cond, dict):
+        if is_logic_block(cond):
+            children = cond.get("and", cond.get("or"))
+            for child in children if isinstance(children, list) else ():
+                collect_interest_terms(child, terms)
+        elif cond.get("field") in INTEREST_FIELDS and isinstance(cond.get("in"), list):
+            terms.update(val.lower() for val in cond["in"] if isinstance(val, str))
+    return terms
+
+
+def expand_rule_terms(conditions, matcher):
+    """
+    Semantic expansion of every tag/genre term in the rule, done once per rule
+    rather than once per user, and in a single expand_many batch when the
+    matcher has one. Like evaluate_condition, only the matcher's expansions
+    are kept (lowercased), not the raw terms.
+
+    Returns {lowercased term: frozenset of lowercased expansions}.
+    """
+    terms = sorted(collect_interest_terms(conditions, set()))
+    if hasattr(matcher, "expand_many"):
+        expanded = matcher.expand_many(terms)
+    else:
+        expanded = [matcher.expand(term) for term in terms]
+    return {term: frozenset(v.lower() for v in found) for term, found in zip(terms, expanded)}
+
+
+def compile_field_condition(condition):
+    field = condition["field"]
+    has_equals = "equals" in condition
+    has_in = "in" in condition
+    in_values = to_membership(condition.get("in"), field) if has_in else None
+    op = compare = val = None
+
+    if "operator" in condition:
+        op = condition["operator"]
+        if op not in COMPARISONS:
+            raise RuleError(f"Unknown operator '{op}' on '{field}'. Expected one of: {', '.join(COMPARISONS)}")
+        try:
+            val = int(condition.get("value"))
+        except (TypeError, ValueError):
+            raise RuleError(f"'{field}' {op} needs a numeric 'value', got: {condition.get('value')!r}")
+        compare = COMPARISONS[op]
+    elif not has_equals and not has_in:
+        raise RuleError(f"Condition on '{field}' needs one of 'operator', 'equals' or 'in': {condition!r}")
+
+    return FieldCondition(field, op, compare, val, has_equals, condition.get("equals"), has_in, in_values)
+
+
+def to_membership(values, field):
+    if not isinstance(values, list):
+        raise RuleError(f"'{field}' 'in' must be a list, got: {values!r}")
+    try:
+        return frozenset(values)
+    except TypeError:
+        return tuple(values)
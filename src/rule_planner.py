@@ -0,0 +1,200 @@
+# src/rule_planner.py
+
+import random
+from collections import Counter
+
+try:
+    from .relation_graph import activity_items, item_interests, relation_successors_of
+    from .rule_compiler import USER_FIELDS, CompiledRule, InterestCondition, LogicBlock, RuleBatch
+except ImportError:
+    from relation_graph import activity_items, item_interests, relation_successors_of
+    from rule_compiler import USER_FIELDS, CompiledRule, InterestCondition, LogicBlock, RuleBatch
+
+# Estimated cost of one check, in attribute lookups. A tag/genre check also
+# pays for every edge of the two-hop walk (RuleStatistics.fanout).
+FIELD_COST = 1.0
+INTEREST_COST = 1.0
+
+# Selectivity assumed when there are no sampled users to estimate from.
+UNKNOWN_SELECTIVITY = 0.5
+
+
+class RuleStatistics:
+    """
+    Graph statistics the planner estimates clause cost and selectivity from,
+    collected over a random sample of users (see collect_rule_statistics):
+
+    sample_size: number of users sampled
+    histograms: field → Counter of attribute values (None when missing)
+    interest_counts: Counter of lowercased interest → sampled users reaching it
+    fanout: mean number of edges a full two-hop interest walk visits per user
+    """
+
+    def __init__(self, sample_size, histograms, interest_counts, fanout):
+        self.sample_size = sample_size
+        self.histograms = histograms
+        self.interest_counts = interest_counts
+        self.fanout = fanout
+
+
+def collect_rule_statistics(graph, sample_size=10_000, seed=0):
+    """
+    Samples up to sample_size user nodes and records their attribute
+    histograms, how many of them reach each interest, and the mean interest
+    walk fan-out. Collect once per graph and reuse across rules.
+    """
+    users = [node for node, data in graph.nodes(data=True) if data.get("type") == "user"]
+    if len(users) > sample_size:
+        users = random.Random(seed).sample(users, sample_size)
+
+    nodes = graph.nodes
+    successors = relation_successors_of(graph)
+    histograms = {field: Counter() for field in USER_FIELDS}
+    interest_counts = Counter()
+    walked = 0
+
+    for user in users:
+        data = nodes[user]
+        for field, histogram in histograms.items():
+            histogram[data.get(field)] += 1
+
+        interests = set()
+        for item in activity_items(successors, user):
+            walked += 1
+            for interest in item_interests(successors, item):
+                walked += 1
+                if isinstance(interest, str):
+                    interests.add(interest.lower())
+        interest_counts.update(interests)
+
+    return RuleStatistics(len(users), histograms, interest_counts, walked / len(users) if users else 0.0)
+
+
+def plan_rule(compiled, statistics):
+    """
+    Returns a copy of a CompiledRule whose "and" / "or" children are
+    reordered by estimated cost and selectivity, so that cheap clauses that
+    decide the block most often run first:
+
+      and: ascending cost / (1 - selectivity)  (cheap clauses that reject)
+      or:  ascending cost / selectivity        (cheap clauses that accept)
+
+    Clauses are assumed independent. Reordering never changes which users
+    match. The estimates are kept on the result for explain_plan().
+    """
+    estimates = {}
+    plan = plan_node(compiled.plan, statistics, estimates, {})
+    return CompiledRule(compiled.conditions, plan, estimates)
+
+
+def plan_rules(batch, statistics):
+    """plan_rule for every rule of a RuleBatch; sub-conditions they share stay shared."""
+    estimates, planned = {}, {}
+    plans = [plan_node(plan, statistics, estimates, planned) for plan in batch.plans]
+    return RuleBatch(batch.names, plans, batch.graph, batch.profiles)
+
+
+def plan_node(node, statistics, estimates, planned):
+    """Plans one node (memoized in `planned`, so shared nodes stay shared)."""
+    if node in planned:
+        return planned[node]
+
+    if isinstance(node, LogicBlock):
+        children = [plan_node(child, statistics, estimates, planned) for child in node.children]
+        order = sorted(range(len(children)), key=lambda i: clause_rank(node.op, *estimates[children[i]]))
+        result = LogicBlock(node.op, [children[i] for i in order], tuple(order))
+        estimates[result] = block_estimate(node.op, [estimates[child] for child in result.children])
+    else:
+        result = node
+        estimates[node] = leaf_estimate(node, statistics)
+
+    planned[node] = result
+    return result
+
+
+def clause_rank(op, cost, selectivity):
+    decisive = 1.0 - selectivity if op == "and" else selectivity
+    return cost / decisive if decisive > 0 else float("inf")
+
+
+def block_estimate(op, child_estimates):
+    """
+    (expected cost, selectivity) of a short-circuiting block evaluating its
+    children in order: a child only runs while the block is undecided.
+    """
+    cost = 0.0
+    undecided = 1.0
+    for child_cost, selectivity in child_estimates:
+        cost += undecided * child_cost
+        undecided *= selectivity if op == "and" else 1.0 - selectivity
+    return cost, undecided if op == "and" else 1.0 - undecided
+
+
+def leaf_estimate(node, statistics):
+    if isinstance(node, InterestCondition):
+        return INTEREST_COST + statistics.fanout, interest_selectivity(node.terms, statistics)
+    return FIELD_COST, field_selectivity(node, statistics)
+
+
+def field_selectivity(node, statistics):
+    """Share of sampled users the condition accepts, read off the field's value histogram."""
+    if not statistics.sample_size:
+        return UNKNOWN_SELECTIVITY
+    histogram = statistics.histograms.get(node.field, {})
+    accepted = sum(count for value, count in histogram.items() if node.predicate({node.field: value}, None))
+    return accepted / statistics.sample_size
+
+
+def interest_selectivity(terms, statistics):
+    """Share of sampled users reaching any of the terms, treating terms as independent."""
+    if not terms:
+        return 0.0
+    if not statistics.sample_size:
+        return UNKNOWN_SELECTIVITY
+    missed = 1.0
+    for term in terms:
+        missed *= 1.0 - statistics.interest_counts.get(term, 0) / statistics.sample_size
+    return 1.0 - missed
+
+
+def explain_plan(compiled):
+    """
+    The plan of a CompiledRule as indented text, one clause per line in
+    evaluation order. For a rule from plan_rule, each line also shows its
+    estimated cost per user and selectivity, and #n is the clause's position
+    in the rule as written.
+    """
+    estimates = compiled.estimates or {}
+    lines = []
+
+    def visit(node, depth, position):
+        prefix = "  " * depth + (f"#{position + 1} " if position is not None else "")
+        text = node.op.upper() if isinstance(node, LogicBlock) else describe_condition(node)
+        if node in estimates:
+            cost, selectivity = estimates[node]
+            text += f"  (cost {cost:.2f}, selectivity {selectivity:.1%})"
+        lines.append(prefix + text)
+
+        if isinstance(node, LogicBlock):
+            positions = node.positions or range(len(node.children))
+            for child, original in zip(node.children, positions):
+                visit(child, depth + 1, original)
+
+    visit(compiled.plan, 0, None)
+    return "\n".join(lines)
+
+
+def describe_condition(node):
+    if isinstance(node, InterestCondition):
+        terms = sorted(node.terms)
+        shown = ", ".join(terms[:5]) + (f", ... ({len(terms)} terms)" if len(terms) > 5 else "")
+        return f"{node.field} in {{{shown}}}"
+
+    parts = []
+    if node.compare is not None:
+        parts.append(f"{node.field} {node.op} {node.value}")
+    if node.has_equals:
+        parts.append(f"{node.field} equals {node.equals!r}")
+    if node.has_in:
+        parts.append(f"{node.field} in {sorted(node.in_values, key=repr)!r}")
+    return " or ".join(parts)
@@ -1,31 +1,142 @@
 # src/semantic_matcher.py
 
-from sentence_transformers import SentenceTransformer, util
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+try:
+    from .embedding_cache import EmbeddingStore, LRUCache, normalize_term
+    from .relation_graph import INTEREST_RELATIONS, relation_edges_of
+    from .vector_index import build_vector_index
+except ImportError:
+    from embedding_cache import EmbeddingStore, LRUCache, normalize_term
+    from relation_graph import INTEREST_RELATIONS, relation_edges_of
+    from vector_index import build_vector_index
+
+# Edge relations whose targets make up the matcher's vocabulary.
+TERM_RELATIONS = INTEREST_RELATIONS
+
 
 class SemanticMatcher:
-    def __init__(self, graph, model_name="all-MiniLM-L6-v2"):
+    """
+    Expands a term to the most similar tag/genre terms in the graph.
+
+    Embeddings come from an on-disk EmbeddingStore keyed by (model_name,
+    normalized term), so KG terms are only encoded the first time they are
+    seen, and query embeddings are kept in an in-process LRU of
+    query_cache_size entries. Pass cache_dir=None to skip the disk store.
+    The SentenceTransformer itself is only loaded when something needs encoding.
+
+    vector_index picks how KG terms are searched: "exact" brute force, or
+    "ivf" for large vocabularies (options such as n_lists / n_probe go in
+    vector_index_options). The IVF index is saved next to the embeddings.
+    """
+
+    def __init__(self, graph, model_name="all-MiniLM-L6-v2", cache_dir=".embedding_cache", query_cache_size=1024,
+                 vector_index="exact", vector_index_options=None):
         self.graph = graph
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self._model = None
+        self.store = EmbeddingStore(cache_dir, model_name) if cache_dir else None
+        self.query_cache = LRUCache(query_cache_size)
         self.kg_terms = self.extract_terms()
-        self.kg_embeddings = self.model.encode(self.kg_terms, convert_to_tensor=True)
+        self.kg_embeddings = unit_rows(self.embed(self.kg_terms))
+        self.vector_index = build_vector_index(
+            vector_index, self.kg_embeddings, self.kg_terms,
+            self.store.path if self.store else None, **(vector_index_options or {})
+        )
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
 
     def extract_terms(self):
+        edges = relation_edges_of(self.graph)
         terms = set()
-        for u, v, data in self.graph.edges(data=True):
-            if data.get("relation") in ["tagged_as", "about"]:
+        for relation in TERM_RELATIONS:
+            for u, v in edges(relation):
                 terms.add(v.lower())
-        return list(terms)
+        return sorted(terms)
+
+    def update(self, new_edges):
+        """
+        Adds the tag/genre terms reached by newly added (source, target,
+        relation) edges to the vocabulary, embedding only the terms it did
+        not have yet.
+        """
+        self.add_terms(target for source, target, relation in new_edges if relation in TERM_RELATIONS)
+
+    def add_terms(self, terms):
+        """Adds terms missing from the vocabulary; returns the ones that were new."""
+        known = set(self.kg_terms)
+        new = [term for term in dict.fromkeys(term.lower() for term in terms) if term not in known]
+        if not new:
+            return []
+
+        vectors = unit_rows(self.embed(new))
+        self.kg_terms.extend(new)
+        self.kg_embeddings = np.concatenate([self.kg_embeddings, vectors]) if len(self.kg_embeddings) else vectors
+        self.vector_index.add(vectors, self.kg_embeddings)
+        return new
+
+    def encode(self, terms):
+        return np.asarray(self.model.encode(list(terms), convert_to_numpy=True), dtype=np.float32)
+
+    def embed(self, terms):
+        """Embeddings for terms, read from the store and encoding only the ones it lacks."""
+        if self.store is None:
+            return self.encode(terms) if terms else np.zeros((0, 0), dtype=np.float32)
+        return self.store.get_many(terms, self.encode)
+
+    def query_embeddings(self, terms):
+        """
+        Unit-length embeddings for query terms, one row per term. Terms missing
+        from the LRU are embedded together in a single batch.
+        """
+        keys = [normalize_term(term) for term in terms]
+        cached = [self.query_cache.get(key) for key in keys]
+        missing = list(dict.fromkeys(key for key, vec in zip(keys, cached) if vec is None))
+
+        if missing:
+            fresh = dict(zip(missing, unit_rows(self.embed(missing))))
+            for key, vec in fresh.items():
+                self.query_cache.put(key, vec)
+            cached = [vec if vec is not None else fresh[key] for key, vec in zip(keys, cached)]
+
+        return np.stack(cached) if cached else np.zeros((0, self.kg_embeddings.shape[1]), dtype=np.float32)
+
+    def expand_many(self, terms, top_k=5, threshold=0.4):
+        """
+        Expansions for several terms at once: one batched encode for the terms
+        not cached yet and one vector index search for all of them.
+        Returns a list of expansions aligned with `terms`.
+        """
+        terms = list(terms)
+        if not self.kg_terms or not terms:
+            return [[] for _ in terms]
+
+        results = self.vector_index.search(self.query_embeddings(terms), top_k, threshold)
+        return [[self.kg_terms[i] for i in indices] for indices, _ in results]
 
     def expand(self, term, top_k=5, threshold=0.4, verbose=False):
-        query_embedding = self.model.encode(term, convert_to_tensor=True)
-        scores = util.cos_sim(query_embedding, self.kg_embeddings)[0]
-    
-        top_indices = (scores >= threshold).nonzero().flatten().tolist()
-        sorted_indices = sorted(top_indices, key=lambda i: scores[i], reverse=True)
-    
+        if not self.kg_terms:
+            return []
+        indices, scores = self.vector_index.search(self.query_embeddings([term]), top_k, threshold)[0]
+
         if verbose:
             print(f"\n🔍 Semantic matches for: '{term}' (threshold={threshold})")
-            for i in sorted_indices[:top_k]:
-                print(f"→ {self.kg_terms[i]} (score: {scores[i]:.3f})")
-    
-        return [self.kg_terms[i] for i in sorted_indices[:top_k]]
\ No newline at end of file
+            for i, score in zip(indices, scores):
+                print(f"→ {self.kg_terms[i]} (score: {score:.3f})")
+
+        return [self.kg_terms[i] for i in indices]
+
+
+def unit_rows(vectors):
+    """Rows scaled to unit length, so a dot product is the cosine similarity."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
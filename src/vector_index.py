@@ -0,0 +1,191 @@
+# src/vector_index.py
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+try:
+    from .array_store import load_array, load_meta, save_arrays
+except ImportError:
+    from array_store import load_array, load_meta, save_arrays
+
+
+class ExactIndex:
+    """Brute-force cosine search: one matrix product against every vector."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def search(self, queries, top_k, threshold):
+        """
+        For each unit-length query row, the (indices, scores) of the top_k
+        vectors scoring at least threshold, best first.
+        """
+        if len(self.vectors) == 0:
+            return [([], []) for _ in queries]
+        results = []
+        for row in queries @ self.vectors.T:
+            best = top_matches(row, top_k, threshold)
+            results.append((best, row[best].tolist()))
+        return results
+
+    def add(self, vectors, all_vectors):
+        """Picks up rows appended to the indexed matrix; all_vectors is the full matrix including them."""
+        self.vectors = all_vectors
+
+
+class IVFIndex:
+    """
+    Approximate cosine search over an inverted file: vectors are grouped
+    around n_lists spherical k-means centroids, and a query only scores the
+    vectors in its n_probe closest lists.
+
+    list_vectors holds the vectors reordered list by list (list k is rows
+    list_indptr[k]:list_indptr[k + 1]), so probing a list is a contiguous
+    slice; list_members maps those rows back to the original positions.
+    """
+
+    def __init__(self, centroids, list_indptr, list_members, list_vectors, n_probe=8):
+        self.centroids = centroids
+        self.list_indptr = list_indptr
+        self.list_members = list_members
+        self.list_vectors = list_vectors
+        self.n_probe = n_probe
+
+    @classmethod
+    def build(cls, vectors, n_lists=None, n_probe=8, iterations=10, seed=0):
+        n = len(vectors)
+        n_lists = max(1, min(n, n_lists or int(np.sqrt(n))))
+        centroids, assignment = spherical_kmeans(vectors, n_lists, iterations, seed)
+        order = np.argsort(assignment, kind="stable")
+        list_indptr = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        return cls(centroids, list_indptr, order, np.asarray(vectors, dtype=np.float32)[order], n_probe)
+
+    def search(self, queries, top_k, threshold):
+        n_probe = min(self.n_probe, len(self.centroids))
+        nearest_lists = np.argpartition(-(queries @ self.centroids.T), n_probe - 1, axis=1)[:, :n_probe]
+        indptr = self.list_indptr
+
+        results = []
+        for query, lists in zip(queries, nearest_lists):
+            # Probe lists in list order so ties still resolve by original position.
+            lists = np.sort(lists)
+            members = np.concatenate([self.list_members[indptr[k]:indptr[k + 1]] for k in lists])
+            scores = np.concatenate([self.list_vectors[indptr[k]:indptr[k + 1]] @ query for k in lists])
+            order = np.argsort(members, kind="stable")
+            members, scores = members[order], scores[order]
+            best = top_matches(scores, top_k, threshold)
+            results.append((members[best].tolist(), scores[best].tolist()))
+        return results
+
+    def add(self, vectors, all_vectors):
+        """
+        Appends new rows (positions continue after the indexed ones) to the
+        lists of their nearest centroids. Centroids are not retrained, so
+        rebuild the index after large vocabulary changes.
+        """
+        start = int(self.list_indptr[-1])
+        n_lists = len(self.centroids)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        old_lists = np.repeat(np.arange(n_lists), np.diff(self.list_indptr))
+        lists = np.concatenate([old_lists, nearest_centroid(vectors, self.centroids)])
+        order = np.argsort(lists, kind="stable")
+
+        self.list_members = np.concatenate([self.list_members, np.arange(start, start + len(vectors))])[order]
+        self.list_vectors = np.concatenate([self.list_vectors, vectors])[order]
+        self.list_indptr = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=n_lists))])
+
+    def save(self, path):
+        arrays = {
+            "centroids": self.centroids,
+            "list_indptr": self.list_indptr,
+            "list_members": self.list_members,
+            "list_vectors": self.list_vectors,
+        }
+        save_arrays(path, arrays, {"n_probe": self.n_probe}, prefix=".tmp_ivf_")
+
+    @classmethod
+    def load(cls, path, n_probe=None):
+        meta = load_meta(path)
+
+        def load(name):
+            return load_array(path, name)
+
+        return cls(load("centroids"), load("list_indptr"), load("list_members"), load("list_vectors"),
+                   n_probe or meta["n_probe"])
+
+
+def build_vector_index(kind, vectors, terms, cache_path=None, **options):
+    """
+    Vector index for the matcher's unit-length KG embeddings.
+
+    kind: "exact" (default brute force) or "ivf" (approximate). An IVF
+    index is saved under cache_path, keyed by the term list and its build
+    options, and loaded from there on later runs.
+    """
+    if kind not in ("exact", "ivf"):
+        raise ValueError(f"Unknown vector index '{kind}'. Expected 'exact' or 'ivf'.")
+    if kind == "exact" or len(vectors) == 0:
+        return ExactIndex(vectors)
+
+    if cache_path is None:
+        return IVFIndex.build(vectors, **options)
+
+    build_options = {k: v for k, v in options.items() if k != "n_probe"}
+    digest = hashlib.sha1(json.dumps([terms, sorted(build_options.items())]).encode("utf-8")).hexdigest()[:16]
+    path = os.path.join(cache_path, f"ivf-{digest}")
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return IVFIndex.load(path, options.get("n_probe"))
+
+    index = IVFIndex.build(vectors, **options)
+    index.save(path)
+    return index
+
+
+def spherical_kmeans(vectors, n_clusters, iterations, seed):
+    """k-means on unit vectors with cosine similarity; returns (centroids, assignment)."""
+    rng = np.random.default_rng(seed)
+    centroids = np.array(vectors[rng.choice(len(vectors), n_clusters, replace=False)], dtype=np.float32)
+
+    for _ in range(iterations):
+        assignment = nearest_centroid(vectors, centroids)
+
+        # Per-cluster sums via one sort + reduceat instead of a Python loop.
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=n_clusters)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)])[filled]
+        sums = np.zeros_like(centroids)
+        sums[filled] = np.add.reduceat(np.asarray(vectors)[order], starts, axis=0)
+
+        # Re-seed empty clusters with random vectors so every list stays useful.
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    return centroids, nearest_centroid(vectors, centroids)
+
+
+def nearest_centroid(vectors, centroids, chunk_size=65536):
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        assignment[start:start + chunk_size] = np.argmax(vectors[start:start + chunk_size] @ centroids.T, axis=1)
+    return assignment
+
+
+def top_matches(scores, top_k, threshold):
+    """
+    Indices of the top_k scores at or above threshold, best first; equal
+    scores keep index order, as a stable sort would. Uses a partition to
+    find the cut-off instead of sorting every candidate.
+    """
+    idx = np.flatnonzero(scores >= threshold)
+    if 0 < top_k < len(idx):
+        cut = len(idx) - top_k
+        kth = np.partition(scores[idx], cut)[cut]
+        idx = idx[scores[idx] >= kth]
+    order = np.lexsort((idx, -scores[idx]))
+    return idx[order][:top_k].tolist()